@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from app.services.warmup import warmup_state
+
+router = APIRouter()
+
+
+@router.get("/health/live")
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    Deliberately checks nothing else, so a slow upstream never gets
+    a healthy worker restarted.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: 200 once warm-up has finished and every required
+    dependency primed successfully, 503 otherwise. The body reports each
+    dependency's warm-up status and latency.
+    """
+    snapshot = warmup_state.snapshot()
+    status_code = 200 if warmup_state.ready else 503
+    return ORJSONResponse(status_code=status_code, content=snapshot)
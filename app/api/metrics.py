@@ -0,0 +1,29 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.metrics import metrics
+
+router = APIRouter()
+
+
+def _require_metrics_token(authorization: Optional[str]):
+    """Constant-time check of a bearer token against METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    scheme, _, value = (authorization or "").partition(" ")
+    # 404 rather than 401/403, so the endpoint doesn't advertise itself
+    if not (token and scheme.lower() == "bearer" and value
+            and hmac.compare_digest(value.encode(), token.encode())):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Process metrics in the Prometheus text format.
+    Each worker process reports its own values.
+    Requires "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    _require_metrics_token(authorization)
+    return metrics.render_prometheus()
@@ -0,0 +1,35 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from app.core.profiling import is_authorized_debug_token, profile_store
+
+router = APIRouter()
+
+
+def _require_debug_token(token: Optional[str]):
+    # 404 rather than 401/403, so the endpoints don't advertise themselves
+    if not is_authorized_debug_token(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/debug/profiles", include_in_schema=False)
+def list_profiles(x_debug_profile: Optional[str] = Header(None)):
+    """
+    Lists the captured request profiles, newest first.
+    Requires the X-Debug-Profile header with the debug token.
+    """
+    _require_debug_token(x_debug_profile)
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/debug/profiles/{profile_id}", include_in_schema=False)
+def download_profile(profile_id: str, x_debug_profile: Optional[str] = Header(None)):
+    """
+    Downloads one profile in the folded-stack format, ready for
+    flamegraph.pl or speedscope.
+    """
+    _require_debug_token(x_debug_profile)
+    path = profile_store.folded_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -1,16 +1,70 @@
 import asyncio
-import datetime 
-from fastapi import APIRouter, Depends, HTTPException, status
+import datetime
+import time
+from typing import Any, Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.task import ActionRequest
-from app.services.firebase_service import get_user_goal, get_user_google_token
+from app.models.task import ActionRequest, PlanWeekPayload, ScheduledEvent, WeekPlan
+from app.models.goal import GoalInDB
+from app.models.user_context import UserContext
+from app.models.action import (
+    ActionHistoryPage,
+    ActionRecord,
+    DEFAULT_HISTORY_PAGE_SIZE,
+    MAX_HISTORY_PAGE_SIZE,
+    action_history_page_adapter
+)
+from app.services.firebase_service import (
+    get_user_context,
+    get_user_goal,
+    get_user_goals_version
+)
+from app.services.goal_index import goal_index
 from app.services.ai_service import AIService
 from app.services.google_service import GoogleService  
+from app.services.action_log import action_log, get_action_history, new_action_id
 from app.core.security import TokenSecurity
+from app.core.executors import run_blocking
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.resilience import UpstreamError
+from app.core.responses import serialize_response
 
 router = APIRouter()
 
+# Recorded for actions whose client disconnected (nginx's "client closed request")
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _match_goal(context: UserContext, goals_version: int, task_prompt: str) -> GoalInDB | None:
+    """
+    Picks the user's goal that best matches the task, using the local
+    goal index, or None if no goal is similar enough. On a miss the index
+    is built from the context's goal summaries, so no extra read is needed.
+    `goals_version` must have been read before the context was loaded.
+    """
+    index = goal_index.get(context.user_id, goals_version)
+    if index is None:
+        index = goal_index.build(context.user_id, context.goal_list(), goals_version)
+
+    matches = index.search(task_prompt, k=1)
+    if not matches or matches[0][1] < settings.GOAL_MATCH_MIN_SIMILARITY:
+        metrics.inc("goal_match_misses_total")
+        return None
+    return matches[0][0]
+
+
+def _load_context(user_id: str) -> Tuple[int, UserContext]:
+    """
+    Returns the user's goals version and context.
+    (This is a SYNCHRONOUS function)
+    """
+    # Read before the context: an index built from an older context
+    # is then filed under a version that is already superseded
+    goals_version = get_user_goals_version(user_id)
+    return goals_version, get_user_context(user_id)
+
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def execute_ai_action(
@@ -20,18 +74,111 @@ async def execute_ai_action(
     """
     This is the main "Action" endpoint.
     It orchestrates the entire "A++" flow.
+    Every outcome, success or failure, is written to the action history.
+    """
+    started = time.perf_counter()
+    audit: Dict[str, Any] = {"latency_ms": {}}
+    status_code, error = status.HTTP_201_CREATED, None
+    try:
+        return await _run_action(request, current_user, audit)
+    except HTTPException as e:
+        status_code, error = e.status_code, str(e.detail)
+        raise
+    except UpstreamError as e:
+        status_code, error = e.status_code, str(e)
+        raise
+    except Exception as e:
+        status_code, error = status.HTTP_500_INTERNAL_SERVER_ERROR, str(e)
+        raise
+    except asyncio.CancelledError:
+        # The client went away mid-action; some writes (e.g. part of a
+        # plan_week) may already have landed, so this is not a success
+        status_code, error = CLIENT_CLOSED_REQUEST, "Request was cancelled before it finished."
+        raise
+    finally:
+        audit["latency_ms"]["total"] = round((time.perf_counter() - started) * 1000, 1)
+        # Only buffered here; the write happens in the background
+        action_log.record(ActionRecord.model_construct(
+            id=new_action_id(),
+            user_id=current_user.uid,
+            task_type=request.task_type,
+            status="succeeded" if error is None else "failed",
+            status_code=status_code,
+            task_prompt=request.prompt_text,
+            error=error,
+            created_at=datetime.datetime.now(datetime.timezone.utc),
+            **audit,
+        ))
+
+
+@router.get("/history")
+async def get_action_history_page(
+    limit: int = Query(DEFAULT_HISTORY_PAGE_SIZE, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Returns the user's past actions, newest first, one page at a time.
     """
-    
-    # --- 1. Get User's "Purpose" (The Goal) ---
     try:
-        goal = await asyncio.to_thread(
-            get_user_goal, current_user.uid, request.payload.goal_id
+        items, next_cursor = await run_blocking(
+            "storage", get_action_history, current_user.uid, limit, cursor
         )
-        if not goal:
+    except UpstreamError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return serialize_response(
+        action_history_page_adapter,
+        ActionHistoryPage.model_construct(items=items, next_cursor=next_cursor),
+    )
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _run_action(request: ActionRequest, current_user: User, audit: Dict[str, Any]):
+    """
+    Runs the action and fills `audit` with what happened along the way
+    (goal, plan, created event, per-step latency).
+    """
+    latency = audit["latency_ms"]
+
+    # --- 1. Get User's "Purpose" (The Goal) ---
+    # The user context (token, goal summaries) is the only read this
+    # action normally makes.
+    step_started = time.perf_counter()
+    try:
+        goals_version, context = await run_blocking("storage", _load_context, current_user.uid)
+        if request.task_type == "plan_week":
+            # Plans span all of the user's goals
+            goal = None
+        elif request.payload.goal_id:
+            goal = context.get_goal(request.payload.goal_id)
+            if goal is None:
+                # Not in the context (e.g. written outside this API); ask storage
+                metrics.inc("user_context_goal_misses_total")
+                goal = await run_blocking(
+                    "storage", get_user_goal, current_user.uid, request.payload.goal_id
+                )
+        else:
+            # No goal given: resolve the best match locally
+            goal = _match_goal(context, goals_version, request.payload.task_prompt)
+        if not goal and request.task_type == "schedule_task":
             raise HTTPException(status_code=404, detail="Goal not found. Please create the goal first.")
+    except (HTTPException, UpstreamError):
+        raise
     except Exception as e:
         print(f"Error fetching goal: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching goal: {e}")
+    finally:
+        latency["goal"] = _elapsed_ms(step_started)
+
+    if request.task_type == "plan_week":
+        return await _plan_week(request.payload, context, audit)
+    audit["goal_id"] = goal.id
 
     # --- 2. Call the AI "Brain" (AIService) ---
     ai_payload = {
@@ -40,23 +187,27 @@ async def execute_ai_action(
         "personality": request.payload.personality
     }
 
+    step_started = time.perf_counter()
     try:
         ai_result = await AIService.execute_task(
             task_type=request.task_type,
             user_id=current_user.uid,
             payload=ai_payload
         )
-    except HTTPException as e:
-        raise e  
+    except (HTTPException, UpstreamError):
+        raise
     except Exception as e:
         print(f"Error in AI service: {e}")
         raise HTTPException(status_code=500, detail=f"Error in AI service: {e}")
-    
+    finally:
+        latency["ai"] = _elapsed_ms(step_started)
+
     # --- 3. Execute the "Plan" (The "Arms") ---
     if request.task_type == "schedule_task":
+        step_started = time.perf_counter()
         try:
-            # 3a. Get the encrypted token
-            encrypted_token = await asyncio.to_thread(get_user_google_token, current_user.uid)
+            # 3a. Get the encrypted token (loaded with the context in step 1)
+            encrypted_token = context.google_refresh_token
             if not encrypted_token:
                 raise HTTPException(status_code=401, detail="User has not authorized Google Calendar.")
             
@@ -65,57 +216,133 @@ async def execute_ai_action(
             if not refresh_token:
                 raise HTTPException(status_code=401, detail="Could not decrypt calendar token.")
             
-            # 3c. Get event data from the AI's plan
-            event_data = ai_result.get("data")
-            
-            # --- THIS IS THE NEW LOGIC (The "Orchestration") ---
-            required_keys = ['title', 'description', 'duration_minutes', 'start_time_iso']
-            if not event_data or not all(k in event_data for k in required_keys):
-                 raise HTTPException(status_code=500, detail="AI failed to return valid event data.")
-
-            # Get data from AI's plan
-            duration_minutes = int(event_data['duration_minutes'])
-            start_time_str = event_data['start_time_iso']
-            recurrence_rrule_str = event_data.get('recurrence_rrule') 
-            
-
-            try:
-                if start_time_str.endswith('Z'):
-                    start_time_str = start_time_str[:-1] + '+00:00'
-                start_time = datetime.datetime.fromisoformat(start_time_str)
-                
-                if start_time.tzinfo is None:
-                     start_time = start_time.replace(tzinfo=datetime.timezone.utc)
-            except ValueError as e:
-                print(f"Error parsing AI-generated start time '{start_time_str}': {e}")
-                start_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=1)
-            
-            end_time = start_time + datetime.timedelta(minutes=duration_minutes)
-            
-            recurrence_list = [f"RRULE:{recurrence_rrule_str}"] if recurrence_rrule_str else None
+            # 3c. Get the event from the AI's plan.
+            # SchedulingSkill already validated it against ScheduledEvent,
+            # so the times and recurrence are ready to use.
+            event: ScheduledEvent = ai_result["data"]
+            recurrence_list = event.recurrence
+            audit["plan"] = event.model_dump(mode="json")
 
             # 3d. Create the event
             created_event = await GoogleService.create_calendar_event(
                 user_refresh_token=refresh_token,
-                title=event_data.get("title"),
-                description=event_data.get("description"),
-                start_time=start_time, 
-                end_time=end_time,     
+                title=event.title,
+                description=event.description,
+                start_time=event.start_time, 
+                end_time=event.end_time,     
                 recurrence=recurrence_list 
             )
-            
+            audit["event_id"] = created_event.get("id")
+            audit["event_link"] = created_event.get("htmlLink")
+
             return {
                 "message": "Task scheduled successfully",
+                "goal_id": goal.id,
                 "event_title": created_event.get("summary"),
                 "event_link": created_event.get("htmlLink"),
                 "recurrence_applied": bool(recurrence_list)
             }
-        except HTTPException as e:
-            raise e
+        except (HTTPException, UpstreamError):
+            raise
         except Exception as e:
             print(f"Error creating calendar event: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to create calendar event: {str(e)}")
+        finally:
+            latency["calendar"] = _elapsed_ms(step_started)
     
     # --- (Future task_types would be handled here) ---
     
-    raise HTTPException(status_code=400, detail="Action executed but no output was produced.")
\ No newline at end of file
+    raise HTTPException(status_code=400, detail="Action executed but no output was produced.")
+
+
+async def _plan_week(payload: PlanWeekPayload, context: UserContext, audit: Dict[str, Any]):
+    """
+    The plan_week action: one model call estimates every task, the week
+    packer places them, and all events are written in one batched pass.
+    """
+    latency = audit["latency_ms"]
+
+    # Checked up front: there's no point planning a week we can't write
+    if not context.google_refresh_token:
+        raise HTTPException(status_code=401, detail="User has not authorized Google Calendar.")
+    refresh_token = TokenSecurity.decrypt(context.google_refresh_token)
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Could not decrypt calendar token.")
+
+    # --- 2. Estimate the tasks and pack the week ---
+    step_started = time.perf_counter()
+    try:
+        ai_result = await AIService.execute_task(
+            task_type="plan_week",
+            user_id=context.user_id,
+            payload={
+                "tasks": payload.tasks,
+                "goals": context.goal_list(),
+                "personality": payload.personality,
+                "preferences": context.preferences,
+                "week_start": payload.week_start
+            }
+        )
+    except (HTTPException, UpstreamError):
+        raise
+    except Exception as e:
+        print(f"Error in AI service: {e}")
+        raise HTTPException(status_code=500, detail=f"Error in AI service: {e}")
+    finally:
+        latency["ai"] = _elapsed_ms(step_started)
+
+    plan: WeekPlan = ai_result["data"]
+    audit["plan"] = plan.model_dump(mode="json")
+
+    # --- 3. Write every event in one pass ---
+    results = []
+    if plan.events:
+        step_started = time.perf_counter()
+        try:
+            results = await GoogleService.create_calendar_events(
+                user_refresh_token=refresh_token,
+                events=[
+                    {
+                        "title": event.title,
+                        "description": event.description,
+                        "start_time": event.start_time,
+                        "end_time": event.end_time
+                    }
+                    for event in plan.events
+                ]
+            )
+        except (HTTPException, UpstreamError):
+            raise
+        except Exception as e:
+            print(f"Error creating calendar events: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to create calendar events: {str(e)}")
+        finally:
+            latency["calendar"] = _elapsed_ms(step_started)
+
+    # Events that were written stay in the calendar even when others
+    # failed, so both lists are reported (and audited) rather than one error
+    events, failed = [], []
+    for event, result in zip(plan.events, results):
+        planned = {
+            "task_index": event.task_index,
+            "title": event.title,
+            "goal_id": event.goal_id,
+            "start_time": event.start_time.isoformat(),
+            "end_time": event.end_time.isoformat(),
+        }
+        if result["event"] is not None:
+            events.append({**planned, "event_id": result["event"].get("id"),
+                           "event_link": result["event"].get("htmlLink")})
+        else:
+            failed.append({**planned, "error": result["error"]})
+    audit["events"] = events
+    audit["failed_events"] = failed
+    if failed:
+        metrics.inc("plan_week_failed_events_total", len(failed))
+
+    return {
+        "message": "Week planned successfully" if not failed else "Week planned; some events could not be created",
+        "events": events,
+        "failed": failed,
+        "unplaced": [task.model_dump() for task in plan.unplaced]
+    }
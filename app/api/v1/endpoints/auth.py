@@ -1,4 +1,3 @@
-import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
 from app.services.google_service import GoogleService
@@ -6,6 +5,8 @@ from app.services.firebase_service import save_user_google_token, get_user_googl
 from app.dependencies import get_current_user
 from app.core.security import TokenSecurity
 from app.core.config import settings
+from app.core.executors import run_blocking
+from app.core.resilience import UpstreamError
 from app.models.user import User
 
 # This is the 'router' that api.py is looking for.
@@ -26,15 +27,17 @@ async def get_google_login(
     
     # This is the new logic to check for permission
     if request.query_params.get("permission") == "true":
-        token = await asyncio.to_thread(get_user_google_token, current_user.uid)
+        token = await run_blocking("storage", get_user_google_token, current_user.uid)
         if token:
             # User already has a token, no need to redirect.
             return {"status": "permission_granted"}
         else:
             # User needs permission. Send the URL for the frontend to handle.
             try:
-                auth_url = GoogleService.get_google_auth_url(state=current_user.uid)
+                auth_url = await run_blocking("google", GoogleService.get_google_auth_url, state=current_user.uid)
                 return {"status": "permission_needed", "auth_url": auth_url}
+            except UpstreamError:
+                raise
             except Exception as e:
                 print(f"Error generating auth URL: {e}")
                 raise HTTPException(
@@ -46,9 +49,11 @@ async def get_google_login(
     # But our frontend flow always uses 'permission=true',
     # so this is our main logic.
     try:
-        auth_url = GoogleService.get_google_auth_url(state=current_user.uid)
+        auth_url = await run_blocking("google", GoogleService.get_google_auth_url, state=current_user.uid)
         # We return JSON, not a RedirectResponse
         return {"status": "permission_needed", "auth_url": auth_url}
+    except UpstreamError:
+        raise
     except Exception as e:
         print(f"Error generating auth URL: {e}")
         raise HTTPException(
@@ -85,7 +90,8 @@ async def google_auth_callback(request: Request, state: str, code: str):
     try:
         encrypted_token = TokenSecurity.encrypt(refresh_token)
 
-        await asyncio.to_thread(
+        await run_blocking(
+            "storage",
             save_user_google_token,
             user_id=user_id,
             google_refresh_token=encrypted_token
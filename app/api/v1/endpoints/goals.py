@@ -1,18 +1,48 @@
-import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from typing import Any, Callable, List, Tuple
+from pydantic import ValidationError
 from app.services.firebase_service import (
     create_user_goal, 
+    create_user_goals_bulk,
     get_user_goals,
-    get_user_goal # We'll add this one now for the next module
+    get_user_goal, # We'll add this one now for the next module
+    get_user_goals_version
 )
+from app.services.goal_index import goal_index
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.goal import GoalCreate, GoalInDB
+from app.models.goal import (
+    GoalCreate,
+    GoalInDB,
+    GoalBulkCreate,
+    GoalBulkItemResult,
+    GoalBulkResult,
+    goal_adapter,
+    goal_list_adapter,
+    goal_create_adapter
+)
+from app.core.executors import run_blocking
+from app.core.resilience import UpstreamError
+from app.core.responses import serialize_response
 
 # This is the 'router' that api.py is looking for.
 router = APIRouter()
 
+# NOTE: The handlers below return pre-serialized responses built from
+# already-validated models. `response_model` is kept for the OpenAPI schema,
+# but FastAPI skips its own re-validation when a Response is returned.
+
+
+def _write_between_versions(write: Callable[..., Any], user_id: str, **kwargs) -> Tuple[int, Any, int]:
+    """
+    Runs a goal write between two reads of the user's goals version, so
+    the goal index can be updated in place afterwards.
+    (This is a SYNCHRONOUS function: the version lives in the shared cache)
+    """
+    previous_version = get_user_goals_version(user_id)
+    result = write(user_id=user_id, **kwargs)
+    return previous_version, result, get_user_goals_version(user_id)
+
 
 @router.post("/", response_model=GoalInDB, status_code=status.HTTP_201_CREATED)
 async def create_new_goal(
@@ -23,19 +53,30 @@ async def create_new_goal(
     Create a new high-level goal (part of the 'RPM' framework).
     """
     try:
+        goal_data = goal_in.model_dump()
+
         # Run the synchronous database call in a separate thread
-        goal_id = await asyncio.to_thread(
-            create_user_goal, 
-            user_id=current_user.uid, 
-            goal_data=goal_in.model_dump()
+        previous_version, goal_id, new_version = await run_blocking(
+            "storage",
+            _write_between_versions,
+            create_user_goal,
+            user_id=current_user.uid,
+            goal_data=goal_data
         )
         
-        # Return the complete object as defined by our GoalInDB model
-        goal_data = goal_in.model_dump()
-        goal_data['id'] = goal_id
-        goal_data['user_id'] = current_user.uid
-        return GoalInDB(**goal_data)
+        # Return the complete object as defined by our GoalInDB model.
+        # The fields were validated by GoalCreate already, so we construct
+        # without validating them a second time.
+        goal = GoalInDB.model_construct(
+            **goal_data, id=goal_id, user_id=current_user.uid
+        )
+        # Keep the goal-matching index current without a rebuild
+        goal_index.add_goals(current_user.uid, [goal], previous_version, new_version)
+        return serialize_response(goal_adapter, goal, status_code=status.HTTP_201_CREATED)
         
+    except UpstreamError:
+        # e.g. the storage pool is saturated: 503, not 500
+        raise
     except Exception as e:
         print(f"Error creating goal: {e}")
         raise HTTPException(
@@ -44,6 +85,70 @@ async def create_new_goal(
         )
 
 
+@router.post("/bulk", response_model=GoalBulkResult, status_code=status.HTTP_200_OK)
+async def create_goals_bulk(
+    bulk_in: GoalBulkCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create many goals in one request (e.g. during onboarding).
+    Every item gets its own result: the new goal ID, or the reason it failed.
+    """
+    results: List[GoalBulkItemResult] = []
+    valid_indexes: List[int] = []
+    valid_goals: List[dict] = []
+
+    # Validate each item separately so one bad item doesn't sink the rest
+    for index, item in enumerate(bulk_in.goals):
+        try:
+            goal = goal_create_adapter.validate_python(item)
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'goal'}: {err['msg']}"
+                for err in e.errors()
+            )
+            results.append(GoalBulkItemResult(index=index, error=error))
+            continue
+        valid_indexes.append(index)
+        valid_goals.append(goal.model_dump())
+
+    if valid_goals:
+        try:
+            # One thread hop and one Firestore commit per 500 goals
+            previous_version, outcomes, new_version = await run_blocking(
+                "storage",
+                _write_between_versions,
+                create_user_goals_bulk,
+                user_id=current_user.uid,
+                goals_data=valid_goals
+            )
+        except UpstreamError:
+            raise
+        except Exception as e:
+            print(f"Error bulk creating goals: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Could not create goals."
+            )
+        created_goals = []
+        for index, goal_data, (goal_id, error) in zip(valid_indexes, valid_goals, outcomes):
+            results.append(GoalBulkItemResult(index=index, id=goal_id, error=error))
+            if goal_id:
+                created_goals.append(
+                    GoalInDB.model_construct(**goal_data, id=goal_id, user_id=current_user.uid)
+                )
+        if created_goals:
+            goal_index.add_goals(current_user.uid, created_goals, previous_version, new_version)
+
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.id)
+    return GoalBulkResult(
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+
 @router.get("/", response_model=List[GoalInDB])
 async def get_all_user_goals(
     current_user: User = Depends(get_current_user)
@@ -53,11 +158,14 @@ async def get_all_user_goals(
     """
     try:
         # Run the synchronous database call in a separate thread
-        goals = await asyncio.to_thread(
-            get_user_goals, 
+        goals = await run_blocking(
+            "storage",
+            get_user_goals,
             user_id=current_user.uid
         )
-        return goals
+        return serialize_response(goal_list_adapter, goals)
+    except UpstreamError:
+        raise
     except Exception as e:
         print(f"Error getting goals: {e}")
         raise HTTPException(
@@ -74,17 +182,20 @@ async def get_single_goal(
     Get a single goal by its ID.
     """
     try:
-        goal = await asyncio.to_thread(
-            get_user_goal, 
+        goal = await run_blocking(
+            "storage",
+            get_user_goal,
             current_user.uid, 
             goal_id
         )
         if not goal:
             raise HTTPException(status_code=404, detail="Goal not found.")
-        return goal
+        return serialize_response(goal_adapter, goal)
+    except (HTTPException, UpstreamError) as e:
+        raise e
     except Exception as e:
         print(f"Error getting single goal: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not retrieve goal."
-        )
\ No newline at end of file
+        )
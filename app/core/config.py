@@ -1,7 +1,8 @@
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import ConfigDict
 
 class Settings(BaseSettings):
@@ -32,6 +33,93 @@ class Settings(BaseSettings):
     FIREBASE_PRIVATE_KEY: str
     FIREBASE_WEB_API_KEY: str
 
+    # Storage backend for users & goals: "firestore" or "sqlite"
+    STORAGE_BACKEND: str = "firestore"
+    SQLITE_PATH: str = "present_os.db"
+    SQLITE_POOL_SIZE: int = 8
+
+    # Host-wide cache shared by all worker processes (see app/core/shared_cache.py)
+    SHARED_CACHE_ENABLED: bool = True
+    SHARED_CACHE_PATH: str = os.path.join(tempfile.gettempdir(), "present_os_cache.db")
+    # Upper bound for cached ID-token claims; never outlives the token's own expiry
+    CACHE_ID_TOKEN_TTL_SECONDS: int = 300
+    CACHE_GOALS_TTL_SECONDS: int = 60
+
+    # LLM providers and model routing (see app/services/ai_skills/routing.py)
+    LLM_PROVIDER: str = "gemini"  # "gemini" or "stub"
+    GEMINI_FAST_MODEL: str = "gemini-2.5-flash-lite"
+    GEMINI_STRONG_MODEL: str = "gemini-2.5-flash-preview-09-2025"
+    MODEL_ROUTING_ENABLED: bool = True
+    # Prompts scoring below this (0..1) go to the fast model
+    ROUTING_COMPLEXITY_THRESHOLD: float = 0.3
+
+    # Per-user goal vector index (see app/services/goal_index.py)
+    GOAL_INDEX_MAX_USERS: int = 10000
+    GOAL_INDEX_MAX_AGE_SECONDS: int = 300
+    # Best matches below this cosine similarity count as no match. With the
+    # hashed embedding, unrelated tasks mostly score under 0.1 and a task
+    # sharing one word (or word stem) with a goal from about 0.15
+    GOAL_MATCH_MIN_SIMILARITY: float = 0.15
+
+    # Resilience (see app/core/resilience.py)
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    GEMINI_TIMEOUT_SECONDS: float = 20.0
+    GOOGLE_TIMEOUT_SECONDS: float = 10.0
+    UPSTREAM_MAX_RETRIES: int = 2
+    RETRY_BACKOFF_BASE_SECONDS: float = 0.2
+    RETRY_BACKOFF_CAP_SECONDS: float = 2.0
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_SECONDS: float = 30.0
+
+    # Buffered action audit log (see app/services/action_log.py)
+    ACTION_LOG_BATCH_SIZE: int = 100
+    ACTION_LOG_FLUSH_INTERVAL_SECONDS: float = 2.0
+    ACTION_LOG_MAX_BUFFER: int = 10000
+
+    # GET /metrics (see app/api/metrics.py). Off unless a token is set;
+    # scrapers send it as "Authorization: Bearer <token>"
+    METRICS_TOKEN: Optional[str] = None
+
+    # Opt-in request profiling (see app/core/profiling.py). Off unless a
+    # debug token or a sample rate is set.
+    PROFILER_DEBUG_TOKEN: Optional[str] = None
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_SECONDS: float = 0.005
+    PROFILER_MAX_SECONDS: float = 30.0
+    PROFILER_DIR: str = os.path.join(tempfile.gettempdir(), "present_os_profiles")
+    PROFILER_MAX_DIR_BYTES: int = 50 * 1024 * 1024
+
+    # Event-loop watchdog (see app/core/loop_watchdog.py)
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_SECONDS: float = 0.05
+    LOOP_WATCHDOG_BLOCK_THRESHOLD_SECONDS: float = 0.1
+    # Tests/load runs only: blocking the loop becomes an error
+    LOOP_WATCHDOG_STRICT: bool = False
+
+    # Bounded thread pools per blocking backend (see app/core/executors.py).
+    # Calls beyond workers + queue are rejected with a 503.
+    EXECUTOR_STORAGE_WORKERS: int = 16
+    EXECUTOR_STORAGE_QUEUE: int = 64
+    EXECUTOR_GOOGLE_WORKERS: int = 16
+    EXECUTOR_GOOGLE_QUEUE: int = 32
+    EXECUTOR_AUTH_WORKERS: int = 4
+    EXECUTOR_AUTH_QUEUE: int = 64
+
+    # Week planner (see app/services/ai_skills/week_planning_skill.py).
+    # Defaults for users whose context has no preferences for these.
+    PLAN_WEEK_TIMEZONE: str = "UTC"
+    PLAN_WEEK_WORKDAY_START_HOUR: int = 9
+    PLAN_WEEK_WORKDAY_END_HOUR: int = 17
+    PLAN_WEEK_WORKING_DAYS: List[int] = [0, 1, 2, 3, 4]  # 0 = Monday
+    PLAN_WEEK_DAYS: int = 7
+    PLAN_WEEK_LEAD_MINUTES: int = 15  # earliest start, counted from now
+
+    # Startup warm-up (see app/services/warmup.py)
+    WARMUP_ENABLED: bool = True
+    WARMUP_STEP_TIMEOUT_SECONDS: float = 10.0
+    # Failed required steps are retried at this interval until they pass
+    WARMUP_RETRY_SECONDS: float = 5.0
+
     model_config = ConfigDict(
         env_file=".env",
         env_file_encoding='utf-8',
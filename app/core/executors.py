@@ -0,0 +1,171 @@
+"""
+Named, bounded thread pools, one per blocking backend.
+
+`asyncio.to_thread` sends everything to one shared default executor, so a
+slow Google API can occupy every thread and stall Firestore reads too.
+Instead, blocking calls go through `run_blocking(pool, fn, ...)`:
+
+    goals = await run_blocking("storage", get_user_goals, user_id)
+
+Each pool has its own thread count and a limit on how many calls may wait
+for a thread. When both are used up the call is rejected right away with
+ExecutorSaturatedError (503 + Retry-After) instead of queueing without
+bound. Like `asyncio.to_thread`, the caller's context variables (request
+deadline, active profile) carry over into the worker.
+
+Per pool, for sizing each one independently:
+  executor_active_threads, executor_queue_depth, executor_utilization (gauges)
+  executor_wait_seconds, executor_run_seconds                        (histograms)
+  executor_tasks_total{outcome=ok|error|rejected}                    (counter)
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Tuple, TypeVar
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.profiling import ProfiledThreadPoolExecutor
+from app.core.resilience import UpstreamUnavailableError
+
+T = TypeVar("T")
+
+# How long a rejected client is told to wait before retrying
+SATURATED_RETRY_AFTER_SECONDS = 1.0
+
+
+class ExecutorSaturatedError(UpstreamUnavailableError):
+    """Every thread of the pool is busy and its wait queue is full."""
+
+    def __init__(self, pool: str):
+        super().__init__(
+            pool, f"Too many concurrent {pool} calls; try again shortly.",
+            retry_after=SATURATED_RETRY_AFTER_SECONDS,
+        )
+
+
+class BoundedExecutor:
+    """A thread pool that admits at most `max_workers + max_queue` calls at once."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ProfiledThreadPoolExecutor(max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._admitted = 0  # queued + running
+        self._active = 0    # running
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return max(0, self._admitted - self._active)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._admitted >= self.max_workers + self.max_queue:
+                admitted = False
+            else:
+                self._admitted += 1
+                admitted = True
+        if not admitted:
+            metrics.inc("executor_tasks_total", executor=self.name, outcome="rejected")
+            raise ExecutorSaturatedError(self.name)
+
+    def _release(self, _future) -> None:
+        # Runs once the call finished, or was cancelled before it started
+        with self._lock:
+            self._admitted -= 1
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        self._admit()
+        context = contextvars.copy_context()
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            metrics.observe("executor_wait_seconds", started - queued_at, executor=self.name)
+            with self._lock:
+                self._active += 1
+            outcome = "error"
+            try:
+                result = context.run(fn, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                metrics.observe("executor_run_seconds", time.perf_counter() - started, executor=self.name)
+                metrics.inc("executor_tasks_total", executor=self.name, outcome=outcome)
+
+        try:
+            future = self._pool.submit(job)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        # Cancelling the awaiting task also cancels the call if it hasn't started
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Pool registry ---
+
+def _pool_limits() -> Dict[str, Tuple[int, int]]:
+    """(max_workers, max_queue) for every named pool."""
+    return {
+        "storage": (settings.EXECUTOR_STORAGE_WORKERS, settings.EXECUTOR_STORAGE_QUEUE),
+        "google": (settings.EXECUTOR_GOOGLE_WORKERS, settings.EXECUTOR_GOOGLE_QUEUE),
+        "auth": (settings.EXECUTOR_AUTH_WORKERS, settings.EXECUTOR_AUTH_QUEUE),
+    }
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Returns the named pool, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                limits = _pool_limits()
+                if name not in limits:
+                    raise ValueError(f"Unknown executor pool '{name}'")
+                max_workers, max_queue = limits[name]
+                executor = _executors.setdefault(name, BoundedExecutor(name, max_workers, max_queue))
+    return executor
+
+
+async def run_blocking(pool: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Runs the blocking `fn(*args, **kwargs)` on the named pool."""
+    return await get_executor(pool).run(fn, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
+
+
+def _executor_samples():
+    for name, executor in list(_executors.items()):
+        labels = {"executor": name}
+        yield ("executor_active_threads", "gauge", labels, executor.active)
+        yield ("executor_queue_depth", "gauge", labels, executor.queue_depth)
+        yield ("executor_max_workers", "gauge", labels, executor.max_workers)
+        yield ("executor_queue_limit", "gauge", labels, executor.max_queue)
+        yield ("executor_utilization", "gauge", labels, executor.active / executor.max_workers)
+
+
+metrics.register_collector(_executor_samples)
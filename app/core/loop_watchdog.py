@@ -0,0 +1,177 @@
+"""
+Event-loop lag and blocking watchdog.
+
+A heartbeat task wakes up every LOOP_WATCHDOG_INTERVAL_SECONDS; how late
+it wakes up is the loop's lag (`event_loop_lag_seconds`). A separate
+thread watches the heartbeat. When the loop has not got back to it for
+LOOP_WATCHDOG_BLOCK_THRESHOLD_SECONDS, some callback is hogging the loop.
+The watchdog then grabs the loop thread's stack *while it is still
+blocked*, so the report points at the offending code rather than at
+whatever ran next. Reports are printed, counted
+(`event_loop_blocked_total`) and the most recent ones are kept in memory.
+
+Strict mode (LOOP_WATCHDOG_STRICT, or `with loop_watchdog.strict():`)
+is for tests and load runs: `check()` raises EventLoopBlockedError when
+anything blocked, so a blocking call that slips into a hot path fails the
+run instead of quietly eating throughput.
+"""
+
+import asyncio
+import collections
+import contextlib
+import sys
+import threading
+import time
+import traceback
+from typing import Deque, List, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class EventLoopBlockedError(RuntimeError):
+    """Raised by `LoopWatchdog.check()` in strict mode."""
+
+    def __init__(self, reports: List["BlockReport"]):
+        self.reports = reports
+        details = "\n\n".join(report.format() for report in reports)
+        super().__init__(f"The event loop was blocked {len(reports)} time(s):\n\n{details}")
+
+
+class BlockReport:
+    """One detected block: how long it had lasted when seen, and where."""
+
+    def __init__(self, blocked_for: float, stack: List[str]):
+        self.detected_at = time.time()
+        self.blocked_for = blocked_for
+        self.stack = stack
+
+    def format(self) -> str:
+        return (
+            f"Event loop blocked for {self.blocked_for * 1000:.0f}ms+ at:\n"
+            + "".join(self.stack)
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "detected_at": self.detected_at,
+            "blocked_for_ms": round(self.blocked_for * 1000, 1),
+            "stack": self.stack,
+        }
+
+
+class LoopWatchdog:
+
+    def __init__(
+        self,
+        interval: float,
+        threshold: float,
+        strict: bool = False,
+        max_reports: int = 50
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.strict_mode = strict
+        self.reports: Deque[BlockReport] = collections.deque(maxlen=max_reports)
+        self._unchecked: List[BlockReport] = []
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._beat = 0
+        self._reported_beat = -1
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self) -> None:
+        """Starts watching the running event loop. Call from inside the loop."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat_task
+            self._heartbeat_task = None
+        if self._thread is not None:
+            # Joined off the loop; the watcher wakes up within `threshold / 2`
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            slept_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - slept_at - self.interval)
+            metrics.observe("event_loop_lag_seconds", lag, buckets=LAG_BUCKETS)
+            metrics.set("event_loop_lag_last_seconds", lag)
+            with self._lock:
+                self._last_beat = now
+                self._beat += 1
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                stalled_for = time.monotonic() - self._last_beat - self.interval
+                beat = self._beat
+                if stalled_for < self.threshold or beat == self._reported_beat:
+                    continue
+                # One report per block, however long it lasts
+                self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._report(BlockReport(stalled_for, traceback.format_stack(frame)))
+
+    def _report(self, report: BlockReport) -> None:
+        with self._lock:
+            self.reports.append(report)
+            self._unchecked.append(report)
+        metrics.inc("event_loop_blocked_total")
+        print(report.format())
+
+    # --- Strict mode ---
+
+    def check(self) -> None:
+        """
+        In strict mode, raises EventLoopBlockedError if anything blocked
+        since the last check. Otherwise just clears the pending reports.
+        """
+        with self._lock:
+            pending, self._unchecked = self._unchecked, []
+        if pending and self.strict_mode:
+            raise EventLoopBlockedError(pending)
+
+    @contextlib.contextmanager
+    def strict(self):
+        """Fails the enclosed block (on exit) if the loop was blocked during it."""
+        previous = self.strict_mode
+        self.strict_mode = True
+        with self._lock:
+            self._unchecked = []
+        try:
+            yield self
+            self.check()
+        finally:
+            self.strict_mode = previous
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL_SECONDS,
+    threshold=settings.LOOP_WATCHDOG_BLOCK_THRESHOLD_SECONDS,
+    strict=settings.LOOP_WATCHDOG_STRICT,
+)
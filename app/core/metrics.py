@@ -0,0 +1,130 @@
+"""
+A tiny in-process metrics registry.
+
+Counters, gauges and fixed-bucket histograms, rendered in the Prometheus
+text format at GET /metrics (which requires METRICS_TOKEN). Components
+that already keep their own state (circuit breakers, the shared cache,
+...) register a collector callback instead of pushing values, so
+scraping always sees the current state.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds, from sub-millisecond to the request deadline
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# A collector yields (name, type, labels, value) samples at scrape time
+Sample = Tuple[str, str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = defaultdict(dict)
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self._lock:
+            self._counters[name][_labels(labels)] += value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[name][_labels(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+        key = _labels(labels)
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        self._collectors.append(collector)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    # --- Rendering ---
+
+    def _collected(self) -> Dict[str, Tuple[str, List[Tuple[Labels, float]]]]:
+        collected: Dict[str, Tuple[str, List[Tuple[Labels, float]]]] = {}
+        for collector in self._collectors:
+            try:
+                for name, kind, labels, value in collector():
+                    collected.setdefault(name, (kind, []))[1].append((_labels(labels), value))
+            except Exception as e:
+                print(f"Metrics collector {collector!r} failed: {e}")
+        return collected
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def fmt(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            body = ",".join(f'{k}="{v}"' for k, v in pairs)
+            return "{" + body + "}"
+
+        with self._lock:
+            counters = {n: dict(v) for n, v in self._counters.items()}
+            gauges = {n: dict(v) for n, v in self._gauges.items()}
+            histograms = {
+                n: {k: (h.buckets, list(h.counts), h.total, h.count) for k, h in v.items()}
+                for n, v in self._histograms.items()
+            }
+
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{fmt(k)} {v:g}" for k, v in series.items())
+        for name, series in sorted(gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{fmt(k)} {v:g}" for k, v in series.items())
+        for name, (kind, series) in sorted(self._collected().items()):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{fmt(k)} {v:g}" for k, v in series)
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, (buckets, counts, total, count) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{fmt(key, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{fmt(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{fmt(key)} {total:g}")
+                lines.append(f"{name}_count{fmt(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
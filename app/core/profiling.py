@@ -0,0 +1,302 @@
+"""
+Opt-in, per-request statistical profiling.
+
+`ProfilingMiddleware` profiles a request when it carries the debug header
+with the configured token (PROFILER_DEBUG_TOKEN), or when it is picked by
+PROFILER_SAMPLE_RATE. Anything else goes straight to the app: the
+middleware isn't even installed unless one of the two is configured.
+
+For a profiled request a sampler thread grabs the stacks of:
+- the event-loop thread running the handler, and
+- every worker thread running the request's blocking work, whether sent
+  through `run_blocking` (app/core/executors.py) or `asyncio.to_thread`.
+  Both the named pools and the loop's default executor are
+  `ProfiledThreadPoolExecutor`s, which register a worker with the active
+  profile while it runs that work.
+
+The event loop is shared, so its samples also include whatever other
+requests were doing at the same moments.
+
+Samples are written in the folded-stack format (one "frame;frame;frame
+count" line per distinct stack). flamegraph.pl, speedscope and inferno
+all read it. Profiles live under PROFILER_DIR, and the oldest ones are
+deleted once the directory exceeds PROFILER_MAX_DIR_BYTES.
+"""
+
+import asyncio
+import collections
+import contextvars
+import functools
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+PROFILE_HEADER = "x-debug-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+
+# Profile IDs are generated by us; anything else is rejected before
+# it gets near the filesystem
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{13}-[0-9a-f]{12}$")
+
+# The profile of the request this task/thread is working for, if any
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{code.co_name} ({module}:{frame.f_lineno})"
+
+
+def _fold(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class RequestProfile:
+    """Samples the stacks of a set of threads until stopped."""
+
+    def __init__(self, label: str, interval: float, max_seconds: float):
+        self.id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:12]}"
+        self.label = label
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: collections.Counter = collections.Counter()
+        self.sample_count = 0
+        self._threads: Dict[int, str] = {}
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self.started_at = time.time()
+        self.duration = 0.0
+
+    # --- Threads to sample ---
+
+    def add_thread(self, role: str, ident: Optional[int] = None) -> None:
+        with self._threads_lock:
+            self._threads[ident or threading.get_ident()] = role
+
+    def remove_thread(self, ident: Optional[int] = None) -> None:
+        with self._threads_lock:
+            self._threads.pop(ident or threading.get_ident(), None)
+
+    def wrap(self, fn):
+        """Wraps executor work so its thread is sampled while it runs."""
+        @functools.wraps(fn)
+        def profiled(*args, **kwargs):
+            self.add_thread("worker")
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.remove_thread()
+        return profiled
+
+    # --- Sampling ---
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Signals the sampler to stop. Doesn't wait for it (see `join`)."""
+        self.duration = time.time() - self.started_at
+        self._stop.set()
+
+    def join(self) -> None:
+        self._sampler.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            with self._threads_lock:
+                threads = dict(self._threads)
+            frames = sys._current_frames()
+            for ident, role in threads.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples[";".join([self.label, role] + _fold(frame))] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfiledThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    A ThreadPoolExecutor that lets an active request profile follow work
+    into its worker threads. When no profile is active, `submit` costs one
+    context-variable lookup.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        profile = _active_profile.get()
+        if profile is not None:
+            fn = profile.wrap(fn)
+        return super().submit(fn, *args, **kwargs)
+
+
+# --- Profile storage ---
+
+class ProfileStore:
+    """
+    `<id>.folded` holds the stacks and `<id>.json` the request details.
+    The directory is trimmed (oldest first) to `max_bytes` on every save.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def save(self, profile: RequestProfile, meta: Dict[str, Any]) -> None:
+        """Waits for the profile's sampler to finish, then writes it. BLOCKING."""
+        profile.join()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile.id, ".folded"), "w", encoding="utf-8") as f:
+            f.write(profile.folded())
+        with open(self._path(profile.id, ".json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self._trim()
+
+    def _trim(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((name, stat.st_size))
+            total = sum(size for _, size in entries)
+            # IDs start with a millisecond timestamp, so names sort oldest first
+            for name, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata for every stored profile, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["size_bytes"] = os.path.getsize(self._path(meta["id"], ".folded"))
+            except (OSError, ValueError, KeyError):
+                # Half-written or already trimmed
+                continue
+            profiles.append(meta)
+        return profiles
+
+    def folded_path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, ".folded")
+        return path if os.path.isfile(path) else None
+
+
+profile_store = ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_DIR_BYTES)
+
+
+def profiler_configured() -> bool:
+    return bool(settings.PROFILER_DEBUG_TOKEN) or settings.PROFILER_SAMPLE_RATE > 0
+
+
+def is_authorized_debug_token(value: Optional[str]) -> bool:
+    """Constant-time check of a debug header against PROFILER_DEBUG_TOKEN."""
+    token = settings.PROFILER_DEBUG_TOKEN
+    return bool(token and value) and hmac.compare_digest(value.encode(), token.encode())
+
+
+# --- Middleware ---
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; see the module docstring."""
+
+    def __init__(self, app, sample_rate: float, interval: float, max_seconds: float):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_seconds = max_seconds
+
+    def _trigger(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return "header" if is_authorized_debug_token(value.decode("latin-1")) else None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self._trigger(scope)
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(
+            f"{scope['method']} {scope['path']}", self.interval, self.max_seconds
+        )
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (PROFILE_ID_HEADER.encode(), profile.id.encode())
+                ]
+            await send(message)
+
+        profile.add_thread("event_loop")
+        token = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _active_profile.reset(token)
+            profile.stop()
+            meta = {
+                "id": profile.id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "trigger": trigger,
+                "started_at": profile.started_at,
+                "duration_ms": round(profile.duration * 1000, 1),
+                "samples": profile.sample_count,
+                "interval_ms": self.interval * 1000,
+            }
+            try:
+                await asyncio.to_thread(profile_store.save, profile, meta)
+                metrics.inc("profiles_captured_total", trigger=trigger)
+            except Exception as e:
+                print(f"Could not save profile {profile.id}: {e}")
@@ -0,0 +1,309 @@
+"""
+Deadlines, retries and circuit breakers for upstream calls.
+
+Every HTTP request gets a deadline budget (RequestDeadlineMiddleware). Calls
+to Gemini and Google go through `call_upstream`, which:
+  - caps each attempt at the smaller of its own timeout and the time left,
+  - retries upstream failures (timeouts, connection errors, 429/5xx) with
+    full-jitter exponential backoff, but only while the budget allows and
+    only for calls that are safe to repeat,
+  - fails fast while the upstream's circuit breaker is open.
+"""
+
+import asyncio
+import contextvars
+import random
+import socket
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from google.api_core import exceptions as google_exceptions
+from google.auth import exceptions as google_auth_exceptions
+from googleapiclient.errors import HttpError
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+# Don't start an attempt with less than this much budget left
+MIN_ATTEMPT_SECONDS = 0.05
+
+
+class UpstreamError(Exception):
+    """Base class for failures the resilience layer reports to clients."""
+    status_code = 502
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """The upstream is failing (breaker open, or retries exhausted)."""
+    status_code = 503
+
+    def __init__(self, upstream: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(UpstreamError):
+    """The request ran out of time before the upstream answered."""
+    status_code = 504
+
+    def __init__(self, upstream: str, message: str):
+        super().__init__(message)
+        self.upstream = upstream
+
+
+# --- Deadline budget ---
+
+# Absolute time.monotonic() deadline of the current request, if any.
+# Context variables are copied into asyncio.to_thread workers, so blocking
+# code can read the remaining budget too.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+def set_deadline(seconds: float) -> contextvars.Token:
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token: contextvars.Token):
+    _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request's budget, or None outside a request."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class RequestDeadlineMiddleware:
+    """Pure ASGI middleware that starts a deadline budget for each HTTP request."""
+
+    def __init__(self, app, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = set_deadline(self.seconds)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
+
+
+# --- Circuit breaker ---
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+    CLOSED: calls flow; `failure_threshold` consecutive failures open it.
+    OPEN: calls are rejected until `recovery_timeout` has passed.
+    HALF_OPEN: one trial call is let through; success closes, failure re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self._transition(self.HALF_OPEN)
+            # HALF_OPEN: only one trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                if self.state != self.OPEN:
+                    self._transition(self.OPEN)
+
+    def release(self):
+        """Ends a call that says nothing about upstream health (e.g. a 4xx)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _transition(self, state: str):
+        print(f"Circuit breaker '{self.name}': {self.state} -> {state}")
+        metrics.inc("upstream_circuit_transitions_total", upstream=self.name, state=state)
+        self.state = state
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(
+                name,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.BREAKER_RECOVERY_SECONDS,
+            ))
+    return breaker
+
+
+def _breaker_samples():
+    for name, breaker in list(_breakers.items()):
+        yield ("upstream_circuit_state", "gauge", {"upstream": name},
+               CircuitBreaker.STATE_VALUES[breaker.state])
+        yield ("upstream_consecutive_failures", "gauge", {"upstream": name}, breaker.failures)
+
+
+metrics.register_collector(_breaker_samples)
+
+
+# --- Error classification ---
+
+def _http_status(exc: BaseException) -> Optional[int]:
+    if isinstance(exc, HttpError):
+        return getattr(exc, "status_code", None) or int(exc.resp.status)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    if isinstance(exc, google_exceptions.GoogleAPICallError):
+        return exc.code if isinstance(exc.code, int) else None
+    return None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """True if `exc` says the upstream is unhealthy (as opposed to a bad request)."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, socket.timeout)):
+        return True
+    if isinstance(exc, (httpx.TransportError, google_auth_exceptions.TransportError, ConnectionError)):
+        return True
+    if isinstance(exc, (google_exceptions.RetryError, google_exceptions.ServerError,
+                        google_exceptions.TooManyRequests, google_exceptions.DeadlineExceeded)):
+        return True
+    status = _http_status(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def is_connect_failure(exc: BaseException) -> bool:
+    """True if the request certainly never reached the upstream."""
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, ConnectionRefusedError))
+
+
+# --- The call wrapper ---
+
+async def call_upstream(
+    upstream: str,
+    make_call: Callable[[Optional[float]], Awaitable[T]],
+    *,
+    timeout: Optional[float] = None,
+    idempotent: bool = True,
+    max_retries: Optional[int] = None,
+) -> T:
+    """
+    Runs `make_call(attempt_timeout)` under the upstream's breaker and the
+    request's deadline. `make_call` should pass the timeout down to its
+    client where it can; it is also enforced here with asyncio.wait_for.
+
+    Non-idempotent calls are only retried when the request never left
+    (connection refused/failed), so they can't be applied twice.
+    """
+    breaker = get_breaker(upstream)
+    retries = settings.UPSTREAM_MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+
+    while True:
+        budget = remaining_budget()
+        if budget is not None and budget < MIN_ATTEMPT_SECONDS:
+            metrics.inc("upstream_calls_total", upstream=upstream, outcome="deadline")
+            raise DeadlineExceededError(upstream, f"No time left to call {upstream}.")
+
+        if not breaker.allow():
+            metrics.inc("upstream_calls_total", upstream=upstream, outcome="rejected")
+            raise UpstreamUnavailableError(
+                upstream, f"{upstream} is temporarily unavailable.", retry_after=breaker.retry_after()
+            )
+
+        limits = [t for t in (timeout, budget) if t is not None]
+        attempt_timeout = min(limits) if limits else None
+        # Was this attempt cut short by the request budget rather than its own timeout?
+        budget_bound = budget is not None and (timeout is None or budget <= timeout)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(make_call(attempt_timeout), attempt_timeout)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            metrics.observe("upstream_call_seconds", time.perf_counter() - started, upstream=upstream)
+            if not is_upstream_failure(e):
+                # The upstream answered; the request itself was bad
+                breaker.release()
+                metrics.inc("upstream_calls_total", upstream=upstream, outcome="error")
+                raise
+
+            timed_out = isinstance(e, (asyncio.TimeoutError, TimeoutError))
+            if timed_out and budget_bound:
+                # Our own request ran out of time; that says little about the upstream
+                breaker.release()
+                metrics.inc("upstream_calls_total", upstream=upstream, outcome="deadline")
+                raise DeadlineExceededError(upstream, f"{upstream} did not answer in time.") from e
+
+            breaker.record_failure()
+            metrics.inc("upstream_calls_total", upstream=upstream, outcome="failure")
+            attempt += 1
+
+            can_repeat = idempotent or is_connect_failure(e)
+            backoff = random.uniform(0, min(
+                settings.RETRY_BACKOFF_CAP_SECONDS,
+                settings.RETRY_BACKOFF_BASE_SECONDS * (2 ** (attempt - 1))
+            ))
+            budget = remaining_budget()
+            out_of_time = budget is not None and budget < backoff + MIN_ATTEMPT_SECONDS
+
+            if not can_repeat or attempt > retries or out_of_time:
+                if timed_out and out_of_time:
+                    raise DeadlineExceededError(upstream, f"{upstream} did not answer in time.") from e
+                raise UpstreamUnavailableError(upstream, f"{upstream} request failed: {e}") from e
+
+            metrics.inc("upstream_retries_total", upstream=upstream)
+            print(f"Retrying {upstream} in {backoff:.2f}s after: {e!r}")
+            await asyncio.sleep(backoff)
+        else:
+            metrics.observe("upstream_call_seconds", time.perf_counter() - started, upstream=upstream)
+            breaker.record_success()
+            metrics.inc("upstream_calls_total", upstream=upstream, outcome="success")
+            return result
@@ -0,0 +1,31 @@
+"""
+Response helpers for the hot JSON endpoints.
+
+FastAPI re-validates whatever a handler returns against its `response_model`
+and then runs it through `jsonable_encoder` before encoding. For models we
+have already validated (straight from the database), that is pure overhead.
+These helpers serialize validated models directly to bytes with the
+pre-built pydantic-core serializers and hand FastAPI a finished Response,
+which it passes through untouched.
+"""
+
+from typing import Any
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class JSONBytesResponse(Response):
+    """A Response whose body is already-encoded JSON bytes."""
+    media_type = "application/json"
+
+
+def serialize_response(
+    adapter: TypeAdapter,
+    value: Any,
+    status_code: int = 200
+) -> JSONBytesResponse:
+    """
+    Serializes an already-validated value with `adapter` and wraps it in a
+    Response. No validation happens here.
+    """
+    return JSONBytesResponse(content=adapter.dump_json(value), status_code=status_code)
@@ -12,6 +12,11 @@ try:
 except ValueError:
     raise ValueError("SECRET_KEY must be a 64-character hex-encoded string (32 bytes)")
 
+# The cipher holds no per-message state, so one instance serves every
+# call; encrypt/decrypt then take a few microseconds and stay cheap
+# enough to run inline on the event loop.
+_AESGCM = AESGCM(AES_KEY)
+
 class TokenSecurity:
     """
     Handles encryption and decryption of sensitive tokens using AES-GCM.
@@ -30,7 +35,7 @@ class TokenSecurity:
         if not plaintext:
             return ""
             
-        aesgcm = AESGCM(AES_KEY)
+        aesgcm = _AESGCM
         # A 12-byte nonce is recommended for AES-GCM
         nonce = os.urandom(12)
         
@@ -60,7 +65,7 @@ class TokenSecurity:
             nonce = encrypted_data[:12]
             ciphertext = encrypted_data[12:]
             
-            aesgcm = AESGCM(AES_KEY)
+            aesgcm = _AESGCM
             
             # Decrypt and return the utf-8 string
             decrypted_bytes = aesgcm.decrypt(nonce, ciphertext, None)
@@ -0,0 +1,203 @@
+"""
+A cache shared by every worker process on the host.
+
+Entries live in a small SQLite database in WAL mode, so one uvicorn worker
+can reuse what another one already verified or fetched: ID-token claims,
+Google access tokens and goal snapshots. Entries expire by TTL (checked on
+read, and purged periodically on write).
+
+Anything that grants access (token claims, access tokens) goes through
+`get_secret`/`set_secret`, which encrypt with TokenSecurity. AES-GCM is
+authenticated, so a tampered cache file can't be used to forge a login.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import TokenSecurity
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at);
+"""
+
+# Run an expiry sweep every this many writes (per process)
+_PURGE_EVERY = 256
+
+
+def cache_key(secret: str) -> str:
+    """Hashes a secret (ID token, refresh token) into a cache key."""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """Host-wide key/value cache with per-entry TTLs."""
+
+    def __init__(self, path: str, enabled: bool = True, busy_timeout_ms: int = 2000):
+        self.path = path
+        self.enabled = enabled
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._writes = 0
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.errors = 0
+        if enabled:
+            try:
+                self._conn().executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"Shared cache unavailable at {path}, disabling it: {e}")
+                self.enabled = False
+
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared between threads, and we're
+        # called from both the event loop and worker threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Raw bytes API ---
+
+    def get(self, ns: str, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE ns = ? AND key = ? AND expires_at > ?",
+                (ns, key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            # The cache is an optimisation; never fail a request because of it
+            self.errors += 1
+            print(f"Shared cache read failed ({ns}): {e}")
+            return None
+        if row is None:
+            self.misses[ns] += 1
+            return None
+        self.hits[ns] += 1
+        return row[0]
+
+    def set(self, ns: str, key: str, value: bytes, ttl: float) -> None:
+        if not self.enabled or ttl <= 0:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (ns, key, value, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache write failed ({ns}): {e}")
+
+    def delete(self, ns: str, key: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._conn().execute("DELETE FROM cache WHERE ns = ? AND key = ?", (ns, key))
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache delete failed ({ns}): {e}")
+
+    def incr(self, ns: str, key: str, ttl: float) -> int:
+        """
+        Atomically bumps a counter and returns the new value. A missing
+        counter starts from the current time in nanoseconds, so a counter
+        that expired and restarted never repeats an old value.
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        try:
+            row = self._conn().execute(
+                "INSERT INTO cache (ns, key, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ns, key) DO UPDATE SET "
+                "value = CAST(cache.value AS INTEGER) + 1, expires_at = excluded.expires_at "
+                "RETURNING value",
+                (ns, key, time.time_ns(), now + ttl),
+            ).fetchone()
+            return int(row[0])
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache increment failed ({ns}): {e}")
+            return 0
+
+    def get_counter(self, ns: str, key: str) -> int:
+        value = self.get(ns, key)
+        return int(value) if value is not None else 0
+
+    # --- JSON & encrypted helpers ---
+
+    def get_json(self, ns: str, key: str) -> Optional[Any]:
+        value = self.get(ns, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, ns: str, key: str, value: Any, ttl: float) -> None:
+        self.set(ns, key, json.dumps(value).encode("utf-8"), ttl)
+
+    def get_secret(self, ns: str, key: str) -> Optional[Any]:
+        value = self.get(ns, key)
+        if value is None:
+            return None
+        try:
+            return json.loads(TokenSecurity.decrypt(value.decode("utf-8")))
+        except ValueError:
+            # Wrong key (rotated SECRET_KEY) or tampered entry: treat as a miss
+            self.delete(ns, key)
+            return None
+
+    def set_secret(self, ns: str, key: str, value: Any, ttl: float) -> None:
+        encrypted = TokenSecurity.encrypt(json.dumps(value))
+        self.set(ns, key, encrypted.encode("utf-8"), ttl)
+
+    # --- Introspection ---
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            "enabled": self.enabled,
+            "errors": self.errors,
+            "namespaces": {
+                ns: {
+                    "hits": self.hits[ns],
+                    "misses": self.misses[ns],
+                    "hit_rate": self.hits[ns] / max(1, self.hits[ns] + self.misses[ns]),
+                }
+                for ns in namespaces
+            },
+        }
+
+
+shared_cache = SharedCache(settings.SHARED_CACHE_PATH, enabled=settings.SHARED_CACHE_ENABLED)
+
+
+def _cache_samples():
+    for ns in list(set(shared_cache.hits) | set(shared_cache.misses)):
+        yield ("shared_cache_hits_total", "counter", {"namespace": ns}, shared_cache.hits[ns])
+        yield ("shared_cache_misses_total", "counter", {"namespace": ns}, shared_cache.misses[ns])
+    yield ("shared_cache_errors_total", "counter", {}, shared_cache.errors)
+
+
+metrics.register_collector(_cache_samples)
@@ -1,12 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.resilience import RequestDeadlineMiddleware, UpstreamError, UpstreamUnavailableError
+from app.core.executors import shutdown_executors
+from app.core.loop_watchdog import loop_watchdog
+from app.core.profiling import ProfiledThreadPoolExecutor, ProfilingMiddleware, profiler_configured
 from app.api.v1.api import api_router
+from app.api import health, metrics, profiles
+from app.services.action_log import action_log
+from app.services.storage import get_storage
+from app.services.warmup import run_warmup, skip_warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the warm-up in the background so /health/live answers right
+    away, while /health/ready stays 503 until the worker is primed.
+    """
+    if profiler_configured():
+        # Lets a request's profile follow its asyncio.to_thread work
+        asyncio.get_running_loop().set_default_executor(
+            ProfiledThreadPoolExecutor(thread_name_prefix="asyncio")
+        )
+
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(run_warmup())
+    else:
+        skip_warmup()
+
+    yield
+
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    # Write out buffered audit records before the storage goes away
+    await action_log.stop()
+    get_storage().close()
+    shutdown_executors()
+    await loop_watchdog.stop()
+    # In strict mode, a blocked loop fails the test run on shutdown
+    loop_watchdog.check()
+
 
 # Initialize the FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    # orjson is considerably faster than the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
 # --- This is the CRITICAL CORS block ---
@@ -30,8 +79,39 @@ app.add_middleware(
 )
 # --- End of CORS block ---
 
+# Every request gets a deadline budget that upstream calls draw from
+app.add_middleware(RequestDeadlineMiddleware, seconds=settings.REQUEST_DEADLINE_SECONDS)
+
+# Opt-in profiling; not installed at all unless configured
+if profiler_configured():
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        interval=settings.PROFILER_INTERVAL_SECONDS,
+        max_seconds=settings.PROFILER_MAX_SECONDS,
+    )
+
+
+@app.exception_handler(UpstreamError)
+async def upstream_error_handler(request: Request, exc: UpstreamError):
+    """
+    Turns resilience-layer failures into 503 (upstream unavailable)
+    or 504 (deadline exceeded) instead of a generic 500.
+    """
+    headers = {}
+    if isinstance(exc, UpstreamUnavailableError) and exc.retry_after:
+        headers["Retry-After"] = str(max(1, round(exc.retry_after)))
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers=headers
+    )
+
 # Include our v1 API routes (from /api/v1/api.py)
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(health.router, tags=["Health"])
+app.include_router(profiles.router, tags=["Debug"])
 
 @app.get("/")
 def read_root():
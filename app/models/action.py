@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Dict, List, Literal, Optional
+import datetime
+
+# Limits for GET /actions/history
+DEFAULT_HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+class ActionRecord(BaseModel):
+    """
+    The audit entry for one call to POST /actions.
+    IDs sort by creation time, so they double as pagination cursors.
+    """
+    id: str = Field(..., description="Time-ordered record ID")
+    user_id: str = Field(..., description="The user who ran the action")
+    task_type: str
+    status: Literal["succeeded", "failed"]
+    status_code: int = Field(..., description="HTTP status returned to the client")
+    task_prompt: str
+    goal_id: Optional[str] = None
+    plan: Optional[Dict[str, Any]] = Field(None, description="The AI plan that was executed")
+    event_id: Optional[str] = None
+    event_link: Optional[str] = None
+    events: Optional[List[Dict[str, Any]]] = Field(None, description="plan_week: the events that were created")
+    failed_events: Optional[List[Dict[str, Any]]] = Field(
+        None, description="plan_week: planned events the calendar did not accept"
+    )
+    error: Optional[str] = None
+    latency_ms: Dict[str, float] = Field(
+        default_factory=dict, description="Time spent per step, plus the total"
+    )
+    created_at: datetime.datetime
+
+class ActionHistoryPage(BaseModel):
+    """One page of a user's action history, newest first."""
+    items: List[ActionRecord]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as `cursor` to fetch the next page; null on the last page"
+    )
+
+
+# --- Pre-built adapters ---
+action_record_adapter = TypeAdapter(ActionRecord)
+action_record_list_adapter = TypeAdapter(List[ActionRecord])
+action_history_page_adapter = TypeAdapter(ActionHistoryPage)
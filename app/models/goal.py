@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Dict, List, Optional
 
 class GoalBase(BaseModel):
     """Base Pydantic model for a Goal."""
@@ -21,4 +21,38 @@ class GoalInDB(GoalBase):
 
     class Config:
         # This allows the model to be created from ORM/database objects
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Upper bound for a single bulk import request
+MAX_BULK_GOALS = 1000
+
+class GoalBulkCreate(BaseModel):
+    """
+    Model for importing many goals at once.
+    Items are validated one by one (not by FastAPI) so that a single bad
+    item is reported in the results instead of rejecting the whole request.
+    """
+    goals: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=MAX_BULK_GOALS,
+        description="The goals to create, each shaped like GoalCreate"
+    )
+
+class GoalBulkItemResult(BaseModel):
+    """The outcome for one item of a bulk import."""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = Field(None, description="The new goal's ID, if it was created")
+    error: Optional[str] = Field(None, description="Why the item was not created")
+
+class GoalBulkResult(BaseModel):
+    """Summary of a bulk import."""
+    created: int
+    failed: int
+    results: List[GoalBulkItemResult]
+
+
+# --- Pre-built adapters for the fast serialization path ---
+# Building a TypeAdapter compiles the pydantic-core validator/serializer,
+# so we do it once at import time instead of on every request.
+goal_adapter = TypeAdapter(GoalInDB)
+goal_list_adapter = TypeAdapter(List[GoalInDB])
+goal_create_adapter = TypeAdapter(GoalCreate)
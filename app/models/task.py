@@ -1,11 +1,180 @@
-from pydantic import BaseModel, Field
-from typing import Literal
+import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Union
+
+# Upper bound for the task list of a single plan_week request
+MAX_PLAN_TASKS = 20
 
 class ScheduleTaskPayload(BaseModel):
     task_prompt: str = Field(..., description="The task to schedule, e.g., 'go to the gym'")
-    goal_id: str = Field(..., description="The ID of the goal this task is for")
+    goal_id: Optional[str] = Field(
+        None,
+        description="The ID of the goal this task is for. If omitted, the best-matching goal is used"
+    )
+    personality: Literal['P', 'A', 'E', 'I'] = Field(..., description="The PAEI personality")
+
+class PlanWeekPayload(BaseModel):
+    tasks: List[str] = Field(
+        ..., min_length=1, max_length=MAX_PLAN_TASKS,
+        description="The tasks to plan, e.g., ['gym 3 times', 'write the quarterly report']"
+    )
     personality: Literal['P', 'A', 'E', 'I'] = Field(..., description="The PAEI personality")
+    week_start: Optional[datetime.date] = Field(
+        None, description="First day to plan, in the user's timezone. Defaults to today"
+    )
+
+    @field_validator("tasks")
+    @classmethod
+    def _tasks_not_blank(cls, value: List[str]) -> List[str]:
+        value = [task.strip() for task in value]
+        if not all(value):
+            raise ValueError("tasks must not be empty")
+        return value
 
-class ActionRequest(BaseModel):
+class ScheduleTaskRequest(BaseModel):
     task_type: Literal['schedule_task'] = Field(..., description="The type of AI action to perform")
-    payload: ScheduleTaskPayload = Field(..., description="The data for this action")
\ No newline at end of file
+    payload: ScheduleTaskPayload = Field(..., description="The data for this action")
+
+    @property
+    def prompt_text(self) -> str:
+        """What the user asked for, as one line (for the action history)."""
+        return self.payload.task_prompt
+
+class PlanWeekRequest(BaseModel):
+    task_type: Literal['plan_week'] = Field(..., description="The type of AI action to perform")
+    payload: PlanWeekPayload = Field(..., description="The data for this action")
+
+    @property
+    def prompt_text(self) -> str:
+        """What the user asked for, as one line (for the action history)."""
+        return "; ".join(self.payload.tasks)
+
+# The body of POST /actions. `task_type` selects the payload model, so a
+# payload is only validated (and its errors only reported) against that one
+ActionRequest = Annotated[Union[ScheduleTaskRequest, PlanWeekRequest], Field(discriminator="task_type")]
+
+class ScheduledEvent(BaseModel):
+    """
+    The calendar event the scheduling skill asks Gemini for.
+    It doubles as Gemini's `response_schema`, so keep field types simple
+    and put limits in validators (Gemini's schema has no min/max keywords).
+    """
+    title: str = Field(..., description="A title for the calendar event, matching your personality.")
+    description: str = Field(..., description="A description that references the user's goal.")
+    duration_minutes: int = Field(..., description="An appropriate duration for this task in minutes.")
+    start_time_iso: datetime.datetime = Field(
+        ..., description="The suggested start time in UTC ISO 8601 format, e.g. 2025-01-31T09:00:00Z."
+    )
+    recurrence_rrule: Optional[str] = Field(
+        None,
+        description="An iCalendar RRULE (e.g. FREQ=WEEKLY;BYDAY=MO) if the task recurs, otherwise null."
+    )
+
+    @field_validator("title", "description")
+    @classmethod
+    def _not_blank(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("must not be empty")
+        return value
+
+    @field_validator("duration_minutes")
+    @classmethod
+    def _sensible_duration(cls, value: int) -> int:
+        if not 1 <= value <= 24 * 60:
+            raise ValueError("must be between 1 and 1440 minutes")
+        return value
+
+    @field_validator("start_time_iso")
+    @classmethod
+    def _utc(cls, value: datetime.datetime) -> datetime.datetime:
+        # The prompt asks for UTC, so a time without an offset is UTC
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value
+
+    @field_validator("recurrence_rrule")
+    @classmethod
+    def _rrule(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        value = value.strip()
+        if value.upper().startswith("RRULE:"):
+            value = value[len("RRULE:"):]
+        if not value or value.lower() == "null":
+            return None
+        if "FREQ=" not in value.upper():
+            raise ValueError("must be an iCalendar RRULE containing FREQ=")
+        return value
+
+    @property
+    def start_time(self) -> datetime.datetime:
+        return self.start_time_iso
+
+    @property
+    def end_time(self) -> datetime.datetime:
+        return self.start_time_iso + datetime.timedelta(minutes=self.duration_minutes)
+
+    @property
+    def recurrence(self) -> Optional[List[str]]:
+        """The recurrence in the list form the Calendar API expects."""
+        return [f"RRULE:{self.recurrence_rrule}"] if self.recurrence_rrule else None
+
+
+# --- Week planning ---
+
+class TaskEstimate(BaseModel):
+    """
+    Gemini's estimate for one task of a week plan. Estimates are soft, so
+    out-of-range numbers are clamped instead of rejected.
+    """
+    index: int = Field(..., description="The task's index in the list you were given.")
+    title: str = Field(..., description="A title for the calendar event, matching your personality.")
+    description: str = Field(..., description="A description that references the task's goal.")
+    goal_id: Optional[str] = Field(None, description="The ID of the goal this task serves, or null if none fits.")
+    duration_minutes: int = Field(..., description="How long one session of the task takes, in minutes.")
+    sessions: int = Field(..., description="How many sessions to plan this week, e.g. 3 for 'gym 3 times'.")
+    priority: int = Field(..., description="1 (can wait) to 5 (most important this week).")
+
+    @field_validator("title", "description")
+    @classmethod
+    def _strip(cls, value: str) -> str:
+        return value.strip()
+
+    @field_validator("duration_minutes")
+    @classmethod
+    def _clamp_duration(cls, value: int) -> int:
+        return min(max(value, 5), 8 * 60)
+
+    @field_validator("sessions")
+    @classmethod
+    def _clamp_sessions(cls, value: int) -> int:
+        return min(max(value, 1), 7)
+
+    @field_validator("priority")
+    @classmethod
+    def _clamp_priority(cls, value: int) -> int:
+        return min(max(value, 1), 5)
+
+class WeekPlanEstimate(BaseModel):
+    """The `plan_week` skill's response_schema: one estimate per task."""
+    tasks: List[TaskEstimate] = Field(..., description="One entry per task, in the order given.")
+
+class PlannedEvent(BaseModel):
+    """One session of a task, placed on the calendar by the week packer."""
+    task_index: int
+    title: str
+    description: str
+    goal_id: Optional[str] = None
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+
+class UnplacedTask(BaseModel):
+    """Sessions that did not fit into the week's working hours."""
+    task_index: int
+    title: str
+    sessions: int
+
+class WeekPlan(BaseModel):
+    events: List[PlannedEvent]
+    unplaced: List[UnplacedTask]
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Dict, List, Optional
+from app.models.goal import GoalBase, GoalInDB
+
+# Bump when the stored layout changes; contexts written under another
+# schema are rebuilt from the source records on their next read
+CONTEXT_SCHEMA_VERSION = 1
+
+
+class UserContext(BaseModel):
+    """
+    Everything an action needs about a user, kept in one document so the
+    actions pipeline can load it with a single read.
+    Token and goal writes update it in the same atomic write as the
+    records themselves; it is never the source of truth.
+    """
+    user_id: str
+    google_refresh_token: Optional[str] = Field(None, description="The encrypted Google refresh token")
+    goals: Dict[str, GoalBase] = Field(default_factory=dict, description="Goal summaries by goal ID")
+    preferences: Dict[str, Any] = Field(default_factory=dict, description="Per-user settings")
+
+    def get_goal(self, goal_id: str) -> Optional[GoalInDB]:
+        summary = self.goals.get(goal_id)
+        if summary is None:
+            return None
+        return GoalInDB.model_construct(id=goal_id, user_id=self.user_id, **dict(summary))
+
+    def goal_list(self) -> List[GoalInDB]:
+        return [self.get_goal(goal_id) for goal_id in self.goals]
+
+
+def goal_summary(goal_data: dict) -> dict:
+    """The part of a goal that is copied into the user context."""
+    return {field: goal_data.get(field) for field in GoalBase.model_fields}
+
+
+user_context_adapter = TypeAdapter(UserContext)
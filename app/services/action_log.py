@@ -0,0 +1,185 @@
+"""
+Buffered audit log for POST /actions.
+
+`action_log.record()` only appends to an in-memory buffer, so the request
+path never waits on storage. A background task flushes the buffer to the
+storage backend as one batched write whenever it reaches
+ACTION_LOG_BATCH_SIZE records or ACTION_LOG_FLUSH_INTERVAL_SECONDS pass,
+whichever comes first. Records still in the buffer are merged into
+history reads, so a user always sees their own latest actions.
+
+The buffer is bounded: if storage is down long enough for it to fill up,
+the oldest records are dropped (and counted) rather than growing memory
+or slowing requests down.
+"""
+
+import asyncio
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from app.core.config import settings
+from app.core.executors import run_blocking
+from app.core.metrics import metrics
+from app.models.action import ActionRecord
+from app.services.storage import get_storage
+
+
+def new_action_id() -> str:
+    """
+    A 32-character ID that sorts by creation time: nanoseconds since the
+    epoch, then random bits so IDs from different workers never collide.
+    """
+    return f"{time.time_ns():020d}{secrets.token_hex(6)}"
+
+
+class ActionLog:
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[ActionRecord] = deque()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Writing ---
+
+    def record(self, record: ActionRecord) -> None:
+        """Queues a record for the next flush. Never blocks and never raises."""
+        try:
+            with self._lock:
+                self._buffer.append(record)
+                dropped = len(self._buffer) - self.max_buffer
+                for _ in range(max(0, dropped)):
+                    self._buffer.popleft()
+                pending = len(self._buffer)
+            metrics.inc("action_log_records_total")
+            if dropped > 0:
+                metrics.inc("action_log_dropped_total", dropped)
+            self._ensure_started()
+            if pending >= self.batch_size and self._wakeup is not None:
+                self._wakeup.set()
+        except Exception as e:
+            print(f"Could not queue action record: {e}")
+
+    def _ensure_started(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop here (a sync caller); the next async record starts it
+            return
+        # Restart if the flusher died or belongs to another event loop
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _take_batch(self) -> List[ActionRecord]:
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _put_back(self, batch: List[ActionRecord]) -> None:
+        # Back at the front, in order, still respecting the buffer bound
+        with self._lock:
+            room = self.max_buffer - len(self._buffer)
+            kept = batch[-room:] if room > 0 else []
+            self._buffer.extendleft(reversed(kept))
+        if len(kept) < len(batch):
+            metrics.inc("action_log_dropped_total", len(batch) - len(kept))
+
+    async def flush(self) -> int:
+        """Writes everything buffered so far. Returns how many records were written."""
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return written
+            started = time.perf_counter()
+            try:
+                await run_blocking("storage", get_storage().create_action_records, batch)
+            except Exception as e:
+                # Keep the records for the next interval instead of losing them
+                print(f"Action log flush of {len(batch)} records failed: {e}")
+                metrics.inc("action_log_flush_failures_total")
+                self._put_back(batch)
+                return written
+            finally:
+                metrics.observe("action_log_flush_seconds", time.perf_counter() - started)
+            written += len(batch)
+
+    async def stop(self) -> None:
+        """Stops the background task and flushes what is left (used on shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    # --- Reading ---
+
+    def pending_for(self, user_id: str, before: Optional[str] = None) -> List[ActionRecord]:
+        """A user's records that haven't been flushed yet, newest first."""
+        with self._lock:
+            records = [
+                record for record in self._buffer
+                if record.user_id == user_id and (before is None or record.id < before)
+            ]
+        records.reverse()
+        return records
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+
+def get_action_history(
+    user_id: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[ActionRecord], Optional[str]]:
+    """
+    Returns one page of a user's history, newest first, and the cursor for
+    the next page (None on the last page). Buffered records are merged in.
+    (This is a SYNCHRONOUS function)
+    """
+    # One extra row tells us whether another page exists
+    stored = get_storage().get_action_records(user_id, limit + 1, before=cursor)
+    merged = {record.id: record for record in stored}
+    for record in action_log.pending_for(user_id, before=cursor):
+        merged.setdefault(record.id, record)
+
+    records = sorted(merged.values(), key=lambda record: record.id, reverse=True)
+    page = records[:limit]
+    next_cursor = page[-1].id if len(records) > limit else None
+    return page, next_cursor
+
+
+action_log = ActionLog(
+    batch_size=settings.ACTION_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTION_LOG_FLUSH_INTERVAL_SECONDS,
+    max_buffer=settings.ACTION_LOG_MAX_BUFFER,
+)
+
+
+def _action_log_samples():
+    yield ("action_log_buffered", "gauge", {}, float(action_log.pending_count()))
+
+
+metrics.register_collector(_action_log_samples)
@@ -1,5 +1,7 @@
 from app.services.ai_skills.scheduling_skill import SchedulingSkill
+from app.services.ai_skills.week_planning_skill import WeekPlanningSkill
 from app.models.goal import GoalInDB
+from app.core.resilience import UpstreamError
 from fastapi import HTTPException 
 
 class AIService:
@@ -27,18 +29,46 @@ class AIService:
                     raise HTTPException(status_code=422, detail="Missing fields for schedule_task")
                 
                 # Call the specific skill
-                event_data = await SchedulingSkill.generate_schedule_event(
+                event = await SchedulingSkill.generate_schedule_event(
                     task_prompt=task_prompt,
                     goal=goal,
                     personality=personality
                 )
-                return {"skill": "schedule_task", "data": event_data}
+                return {"skill": "schedule_task", "data": event}
 
+            except (HTTPException, UpstreamError):
+                raise
             except ValueError as e:
                 raise HTTPException(status_code=500, detail=str(e))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error in scheduling skill: {e}")
         
+        elif task_type == "plan_week":
+            # --- Plan Week Skill ---
+            try:
+                tasks = payload.get("tasks")
+                personality = payload.get("personality")
+
+                if not all([tasks, personality]):
+                    raise HTTPException(status_code=422, detail="Missing fields for plan_week")
+
+                # One model call to estimate every task, then local packing
+                plan = await WeekPlanningSkill.plan_week(
+                    tasks=tasks,
+                    goals=payload.get("goals") or [],
+                    personality=personality,
+                    preferences=payload.get("preferences") or {},
+                    week_start=payload.get("week_start")
+                )
+                return {"skill": "plan_week", "data": plan}
+
+            except (HTTPException, UpstreamError):
+                raise
+            except ValueError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error in week planning skill: {e}")
+
         # --- (Future Skill) ---
         # elif task_type == "draft_email":
         #     # 1. Extract payload
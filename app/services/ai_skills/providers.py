@@ -0,0 +1,129 @@
+"""
+LLM providers behind one small interface.
+
+Skills never talk to a model SDK directly: they go through the model
+router (see routing.py), which picks a provider per request. A provider
+only has to turn `contents` into reply text; retries, timeouts and
+circuit breaking stay in the resilience layer.
+
+`StubProvider` answers locally, for tests and offline runs
+(LLM_PROVIDER=stub).
+"""
+
+import asyncio
+import datetime
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+import google.generativeai as genai
+from app.core.config import settings
+
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+
+class LLMProvider(ABC):
+    """One model endpoint. `upstream` names its circuit breaker and metrics."""
+
+    name: str = "base"
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+
+    @abstractmethod
+    async def generate(
+        self,
+        contents: list,
+        generation_config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Returns the model's reply text. Raises the SDK's own errors."""
+
+    async def warmup(self) -> None:
+        """Opens the connection ahead of the first request."""
+
+
+class GeminiProvider(LLMProvider):
+
+    name = "gemini"
+
+    def __init__(self, model_name: str, upstream: str, model: Any = None):
+        super().__init__(upstream)
+        self.model_name = model_name
+        self.model = model or genai.GenerativeModel(model_name)
+
+    async def generate(
+        self,
+        contents: list,
+        generation_config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        response = await self.model.generate_content_async(
+            contents,
+            generation_config=generation_config,
+            request_options={"timeout": timeout} if timeout else None
+        )
+        return response.text
+
+    async def warmup(self) -> None:
+        # count_tokens is free and opens the same channel generate_content uses
+        await self.model.count_tokens_async("ping")
+
+
+def _stub_value(name: str, schema: Dict[str, Any]) -> Any:
+    """A valid placeholder for one field of a Gemini response_schema."""
+    if schema.get("nullable"):
+        return None
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "OBJECT":
+        return {key: _stub_value(key, sub) for key, sub in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        return [_stub_value(name, schema["items"])] if "items" in schema else []
+    if kind == "INTEGER":
+        return 30
+    if kind == "NUMBER":
+        return 1.0
+    if kind == "BOOLEAN":
+        return False
+    if schema.get("format") == "date-time" or name.endswith("_iso"):
+        start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+        return start.replace(minute=0, second=0, microsecond=0).isoformat()
+    return f"Stub {name.replace('_', ' ')}"
+
+
+def stub_reply(contents: list, generation_config: Optional[Dict[str, Any]]) -> str:
+    """Fills the requested response_schema with placeholder values."""
+    schema = (generation_config or {}).get("response_schema") or {"type": "OBJECT"}
+    return json.dumps(_stub_value("reply", schema))
+
+
+class StubProvider(LLMProvider):
+    """
+    A local stand-in model. Replies come from `responder(contents,
+    generation_config)`, which defaults to a schema-shaped placeholder.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        upstream: str,
+        responder: Callable[[list, Optional[Dict[str, Any]]], str] = stub_reply,
+        latency: float = 0.0
+    ):
+        super().__init__(upstream)
+        self.responder = responder
+        self.latency = latency
+        self.calls = 0
+
+    async def generate(
+        self,
+        contents: list,
+        generation_config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.responder(contents, generation_config)
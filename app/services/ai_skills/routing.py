@@ -0,0 +1,174 @@
+"""
+Routes each LLM request to a model tier.
+
+Prompts are scored locally (no model call) on three signals: length,
+recurrence cues and ambiguity. Prompts scoring below
+ROUTING_COMPLEXITY_THRESHOLD go to the fast tier, the rest to the strong
+tier. If the fast tier is unavailable, the request falls back to the
+strong tier once.
+
+Every decision and call is recorded per route (skill step) and tier:
+  llm_route_decisions_total, llm_complexity_score  - to tune the threshold
+  llm_requests_total, llm_request_seconds          - latency/errors per tier
+  llm_fallbacks_total                              - how often fast wasn't enough
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.resilience import DeadlineExceededError, UpstreamError, call_upstream
+from app.services.ai_skills.providers import GeminiProvider, LLMProvider, StubProvider
+
+FAST = "fast"
+STRONG = "strong"
+
+COMPLEXITY_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+# --- Complexity signals ---
+# Prompts at or beyond this many words get the full length score
+_LONG_PROMPT_WORDS = 40
+
+_RECURRENCE_CUES = re.compile(
+    r"\b(every|each|daily|weekly|monthly|yearly|weekdays?|weekends?|routine|habit|"
+    r"recurring|repeat(?:ing)?|biweekly|fortnightly|until|times a (?:day|week|month)|"
+    r"(?:mon|tues|wednes|thurs|fri|satur|sun)days?)\b",
+    re.IGNORECASE,
+)
+_AMBIGUITY_CUES = re.compile(
+    r"\b(sometime|soon|later|whenever|maybe|perhaps|either|or|around|about|ish|"
+    r"flexible|not sure|if possible|unless|depending|before|after|between|ideally)\b",
+    re.IGNORECASE,
+)
+# Several tasks or constraints packed into one prompt
+_CLAUSE_SPLIT = re.compile(r"[,;]| and then | then | also ", re.IGNORECASE)
+
+_WEIGHTS = {"length": 0.25, "recurrence": 0.4, "ambiguity": 0.35}
+
+
+class Complexity(NamedTuple):
+    score: float
+    signals: Dict[str, float]
+
+
+def classify_complexity(prompt: str) -> Complexity:
+    """Scores a prompt between 0 (trivial) and 1 (hard)."""
+    words = len(prompt.split())
+    recurrence_hits = len(_RECURRENCE_CUES.findall(prompt))
+    ambiguity_hits = len(_AMBIGUITY_CUES.findall(prompt)) + prompt.count("?")
+    clauses = len(_CLAUSE_SPLIT.split(prompt))
+
+    signals = {
+        "length": min(words / _LONG_PROMPT_WORDS, 1.0),
+        # One cue ("weekly") is a plain RRULE; several ("every Mon and Wed") need BYDAY etc.
+        "recurrence": min(recurrence_hits / 2, 1.0),
+        "ambiguity": min((ambiguity_hits + clauses - 1) / 3, 1.0),
+    }
+    score = sum(_WEIGHTS[name] * value for name, value in signals.items())
+    return Complexity(round(score, 3), signals)
+
+
+class ModelRouter:
+    """Picks a tier per request and calls its provider through call_upstream."""
+
+    def __init__(
+        self,
+        fast: LLMProvider,
+        strong: LLMProvider,
+        threshold: float,
+        enabled: bool = True
+    ):
+        self.fast = fast
+        self.strong = strong
+        self.threshold = threshold
+        self.enabled = enabled
+
+    def providers(self) -> List[LLMProvider]:
+        return [self.fast] if self.fast is self.strong else [self.fast, self.strong]
+
+    def choose_tier(self, route: str, prompt: str) -> str:
+        if not self.enabled:
+            return STRONG
+        complexity = classify_complexity(prompt)
+        tier = FAST if complexity.score < self.threshold else STRONG
+        metrics.observe("llm_complexity_score", complexity.score, buckets=COMPLEXITY_BUCKETS, route=route)
+        metrics.inc("llm_route_decisions_total", route=route, tier=tier)
+        return tier
+
+    async def _call(
+        self,
+        route: str,
+        tier: str,
+        contents: list,
+        generation_config: Optional[Dict[str, Any]],
+        max_retries: Optional[int] = None
+    ) -> str:
+        provider = self.fast if tier == FAST else self.strong
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            text = await call_upstream(
+                provider.upstream,
+                lambda timeout: provider.generate(contents, generation_config, timeout),
+                timeout=settings.GEMINI_TIMEOUT_SECONDS,
+                max_retries=max_retries,
+            )
+            outcome = "ok"
+            return text
+        finally:
+            metrics.inc("llm_requests_total", route=route, tier=tier, outcome=outcome)
+            metrics.observe("llm_request_seconds", time.perf_counter() - started, route=route, tier=tier)
+
+    async def generate(
+        self,
+        route: str,
+        contents: list,
+        *,
+        prompt: Optional[str] = None,
+        tier: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Returns the reply text. The tier is `tier` if given, otherwise it
+        is chosen from `prompt`'s complexity.
+        """
+        if tier is None:
+            tier = self.choose_tier(route, prompt or "")
+        if tier == STRONG or self.fast is self.strong:
+            return await self._call(route, STRONG, contents, generation_config)
+
+        # The strong tier is the fallback, so don't spend time retrying fast
+        try:
+            return await self._call(route, FAST, contents, generation_config, max_retries=0)
+        except DeadlineExceededError:
+            raise
+        except UpstreamError as e:
+            print(f"Fast model tier failed for {route}, falling back to strong: {e}")
+            metrics.inc("llm_fallbacks_total", route=route, reason="upstream")
+            return await self._call(route, STRONG, contents, generation_config)
+
+    async def warmup(self) -> None:
+        await asyncio.gather(*(provider.warmup() for provider in self.providers()))
+
+
+def build_model_router() -> ModelRouter:
+    """Creates the router for the configured LLM_PROVIDER ("gemini" or "stub")."""
+    provider = settings.LLM_PROVIDER.lower()
+    if provider == "gemini":
+        fast = GeminiProvider(settings.GEMINI_FAST_MODEL, upstream="gemini_fast")
+        strong = GeminiProvider(settings.GEMINI_STRONG_MODEL, upstream="gemini_strong")
+    elif provider == "stub":
+        fast = StubProvider(upstream="stub_fast")
+        strong = StubProvider(upstream="stub_strong")
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER '{settings.LLM_PROVIDER}'")
+    return ModelRouter(
+        fast, strong,
+        threshold=settings.ROUTING_COMPLEXITY_THRESHOLD,
+        enabled=settings.MODEL_ROUTING_ENABLED,
+    )
+
+
+model_router = build_model_router()
@@ -1,15 +1,22 @@
-import google.generativeai as genai
-from app.core.config import settings
+from pydantic import TypeAdapter, ValidationError
+from app.core.metrics import metrics
+from app.core.resilience import UpstreamError
 import json
 from app.models.goal import GoalInDB
+from app.models.task import ScheduledEvent
+from app.services.ai_skills.routing import FAST, STRONG, model_router
+from app.services.ai_skills.schema import gemini_schema, subset_schema
 import datetime
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Gemini is constrained to this schema, and replies are parsed with one
+# pre-built adapter straight from the JSON text.
+SCHEDULED_EVENT_SCHEMA = gemini_schema(ScheduledEvent)
+scheduled_event_adapter = TypeAdapter(ScheduledEvent)
 
-model = genai.GenerativeModel(
-    'gemini-2.5-flash-preview-09-2025',
-    generation_config={"response_mime_type": "application/json"}
-)
+SCHEDULED_EVENT_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": SCHEDULED_EVENT_SCHEMA
+}
 
 class SchedulingSkill:
     
@@ -96,13 +103,84 @@ class SchedulingSkill:
         else:
             return base_prompt
 
+    @staticmethod
+    async def _call_model(
+        route: str,
+        contents: list,
+        tier: str,
+        generation_config: dict = SCHEDULED_EVENT_CONFIG
+    ) -> str:
+        """Sends one request to the routed model tier; returns the reply text."""
+        return await model_router.generate(
+            route, contents, tier=tier, generation_config=generation_config
+        )
+
+    @staticmethod
+    async def _repair_event(
+        json_text: str,
+        error: ValidationError,
+        user_prompt: str,
+        current_time_utc: str
+    ) -> ScheduledEvent:
+        """
+        One targeted retry: asks Gemini to re-generate only the fields that
+        failed validation, then merges them into the first reply.
+        """
+        try:
+            event_data = json.loads(json_text)
+        except ValueError:
+            event_data = None
+        if not isinstance(event_data, dict):
+            event_data = {}
+
+        invalid_fields = sorted({
+            str(err["loc"][0]) for err in error.errors()
+            if err["loc"] and err["loc"][0] in SCHEDULED_EVENT_SCHEMA["properties"]
+        })
+        if not invalid_fields or not event_data:
+            # Nothing usable to keep: ask for every field again
+            invalid_fields = list(SCHEDULED_EVENT_SCHEMA["properties"])
+
+        problems = "\n".join(
+            f"- {'.'.join(str(part) for part in err['loc']) or 'reply'}: {err['msg']} "
+            f"(you sent {json.dumps(event_data.get(err['loc'][0])) if err['loc'] else 'invalid JSON'})"
+            for err in error.errors()
+        )
+        valid_fields = {k: v for k, v in event_data.items() if k not in invalid_fields}
+        repair_prompt = f"""
+        Your previous JSON reply for a calendar event had invalid fields:
+        {problems}
+
+        The user's task was: {user_prompt}
+        The current time (UTC) is: {current_time_utc}
+        The valid fields you already returned were: {json.dumps(valid_fields, default=str)}
+
+        Return a JSON object with ONLY these corrected fields: {", ".join(invalid_fields)}.
+        """
+        # Repairs always go to the strong tier
+        reply_text = await SchedulingSkill._call_model(
+            "schedule_task.repair",
+            [repair_prompt],
+            tier=STRONG,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": subset_schema(SCHEDULED_EVENT_SCHEMA, invalid_fields)
+            }
+        )
+
+        fixed = json.loads(reply_text)
+        if not isinstance(fixed, dict):
+            raise ValueError("AI repair reply was not a JSON object.")
+        event_data.update({k: v for k, v in fixed.items() if k in invalid_fields})
+        return scheduled_event_adapter.validate_python(event_data)
+
     @staticmethod
     async def generate_schedule_event(
         task_prompt: str,  
         goal: GoalInDB,  
         personality: str
-    ) -> dict:
-        """Calls the Gemini API to generate a structured calendar event."""
+    ) -> ScheduledEvent:
+        """Asks the routed model tier for a structured calendar event."""
         
         current_time_utc = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
@@ -111,24 +189,37 @@ class SchedulingSkill:
         )
         user_prompt = f"The user wants to schedule this task: '{task_prompt}'"
 
+        # Simple prompts go to the fast tier, harder ones to the strong tier
+        tier = model_router.choose_tier("schedule_task", task_prompt)
+
         try:
-            response = await model.generate_content_async(
-                [system_instruction, user_prompt]
+            json_text = await SchedulingSkill._call_model(
+                "schedule_task", [system_instruction, user_prompt], tier=tier
             )
-            
-            json_text = response.text
-            event_data = json.loads(json_text)
-            
-            required_keys = ['title', 'description', 'duration_minutes', 'start_time_iso']
-            if not all(k in event_data for k in required_keys):
-                print(f"AI response missing keys: {event_data}")
-                raise ValueError("AI response missing required JSON keys.")
-            
-            if 'recurrence_rrule' not in event_data:
-                event_data['recurrence_rrule'] = None 
-                
-            return event_data
 
+            try:
+                return scheduled_event_adapter.validate_json(json_text)
+            except ValidationError as e:
+                validation_error = e
+                metrics.inc("gemini_parse_failures_total", skill="schedule_task", stage="initial")
+                if tier == FAST:
+                    metrics.inc("llm_fallbacks_total", route="schedule_task", reason="invalid_output")
+                print(f"AI response failed validation, attempting repair: "
+                      f"{[(err['loc'], err['msg']) for err in e.errors()]}")
+
+            try:
+                event = await SchedulingSkill._repair_event(
+                    json_text, validation_error, user_prompt, current_time_utc
+                )
+            except (ValidationError, ValueError) as repair_error:
+                metrics.inc("gemini_parse_failures_total", skill="schedule_task", stage="repair")
+                raise ValueError(f"AI response was invalid after repair: {repair_error}")
+            metrics.inc("gemini_repairs_total", skill="schedule_task")
+            return event
+
+        except UpstreamError:
+            # Let the resilience layer's 503/504 reach the client as-is
+            raise
         except Exception as e:
-            print(f"Error calling Gemini API for scheduling: {e}")
-            raise ValueError(f"AI JSON generation failed: {str(e)}")
\ No newline at end of file
+            print(f"Error calling the AI model for scheduling: {e}")
+            raise ValueError(f"AI JSON generation failed: {str(e)}")
@@ -0,0 +1,74 @@
+"""
+Turns pydantic models into Gemini `response_schema`s.
+
+Gemini accepts only a subset of OpenAPI 3.0 (type, format, description,
+nullable, enum, properties, required, items), and google-generativeai
+rejects anything else, including `default`, `title` and range
+constraints. Models therefore stay the source of truth for validation,
+and this module derives the reduced schema Gemini is allowed to see.
+"""
+
+from typing import Any, Dict, Type
+from pydantic import BaseModel
+
+_ALLOWED_KEYS = {"type", "format", "description", "nullable", "enum", "properties", "required", "items"}
+# The only string format Gemini's schema supports besides enum
+_ALLOWED_STRING_FORMATS = {"date-time"}
+
+
+def _convert(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        node = {**defs[node["$ref"].split("/")[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+
+    # Optional[X] is rendered as anyOf [X, null] -> X with nullable=True
+    if "anyOf" in node:
+        variants = [v for v in node["anyOf"] if v.get("type") != "null"]
+        if len(variants) != 1:
+            raise ValueError("Only Optional[X] unions can be expressed in a Gemini schema.")
+        nullable = len(variants) < len(node["anyOf"])
+        merged = {**variants[0], **{k: v for k, v in node.items() if k != "anyOf"}}
+        converted = _convert(merged, defs)
+        if nullable:
+            converted["nullable"] = True
+        return converted
+
+    schema: Dict[str, Any] = {}
+    for key, value in node.items():
+        if key not in _ALLOWED_KEYS:
+            continue
+        if key == "type":
+            schema["type"] = value.upper()
+        elif key == "format":
+            if value in _ALLOWED_STRING_FORMATS:
+                schema["format"] = value
+        elif key == "properties":
+            schema["properties"] = {name: _convert(prop, defs) for name, prop in value.items()}
+        elif key == "items":
+            schema["items"] = _convert(value, defs)
+        else:
+            schema[key] = value
+    if "properties" in schema:
+        schema["required"] = list(schema["properties"])
+    if "enum" in schema:
+        schema["type"] = "STRING"
+        schema["enum"] = [str(v) for v in schema["enum"]]
+    return schema
+
+
+def gemini_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Returns `model`'s JSON schema reduced to what Gemini supports. Every
+    property is listed as required so the model always emits each key
+    (optional fields are nullable rather than omittable).
+    """
+    json_schema = model.model_json_schema()
+    schema = _convert(json_schema, json_schema.get("$defs", {}))
+    # The class docstring is written for developers, not for the model
+    schema.pop("description", None)
+    return schema
+
+
+def subset_schema(schema: Dict[str, Any], fields) -> Dict[str, Any]:
+    """Returns an object schema containing only `fields` of `schema`."""
+    properties = {name: schema["properties"][name] for name in fields if name in schema["properties"]}
+    return {"type": "OBJECT", "properties": properties, "required": list(properties)}
@@ -0,0 +1,198 @@
+"""
+Places a week's task sessions into working hours, locally.
+
+The LLM only estimates each task (duration, sessions, priority); where
+the sessions go is decided here, so planning N tasks costs one model
+call plus a few milliseconds of packing.
+
+Packing is greedy: sessions are placed most important first (then
+longest first, since long sessions are the hardest to fit). Every free,
+aligned start in every working window is a candidate, and the cheapest
+one under the personality's `PackingStyle` wins. Constraints:
+- sessions stay inside working hours and never overlap (plus the
+  style's buffer on both sides),
+- sessions of one task go on different days,
+- nothing starts before `not_before` (now plus a small lead).
+Sessions that fit nowhere are returned as unplaced rather than forced in.
+
+All times are minutes since the Unix epoch, which keeps the inner loop
+to integer arithmetic; `working_windows` converts from the user's local
+working hours.
+"""
+
+import bisect
+import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_minutes(moment: datetime.datetime) -> int:
+    return int((moment - _EPOCH).total_seconds() // 60)
+
+
+def from_minutes(minutes: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(minutes=minutes)
+
+
+class PackingStyle(NamedTuple):
+    """How one PAEI personality likes its week laid out."""
+    align_minutes: int     # sessions start on multiples of this (local time)
+    buffer_minutes: int    # kept free before and after every session
+    skip_first_day: bool   # leave the first day free to prepare
+    target: float          # preferred start within a day's window: 0 = earliest, 1 = latest
+    day_weight: float      # cost per day of delay (favours early days)
+    load_weight: float     # cost per minute already booked that day (favours spreading out)
+    target_weight: float   # cost per minute away from `target`
+    repeat_weight: float   # cost per minute away from the task's previous session time
+
+
+PAEI_STYLES: Dict[str, PackingStyle] = {
+    # Producer: soonest logical time, back to back
+    "P": PackingStyle(15, 0, False, 0.0, 2000.0, 0.0, 1.0, 0.0),
+    # Administrator: on the hour, same time every day, early in the day
+    "A": PackingStyle(60, 0, False, 0.0, 60.0, 0.1, 1.0, 2.0),
+    # Entrepreneur: a day to prepare, mornings for focused work, room in between
+    "E": PackingStyle(30, 15, True, 0.15, 30.0, 0.5, 1.0, 0.0),
+    # Integrator: low-stress end-of-day slots, spread evenly over the week
+    "I": PackingStyle(30, 15, False, 1.0, 0.0, 1.0, 1.0, 0.0),
+}
+
+
+class Window(NamedTuple):
+    """One day's working hours, in epoch minutes."""
+    day: int          # index of the day within the plan
+    start: int
+    end: int
+    utc_offset: int   # local time minus UTC, in minutes, so starts align to local hours
+
+
+class PackingItem(NamedTuple):
+    key: int          # caller's ID for the task (e.g. its index)
+    duration: int     # minutes per session
+    sessions: int
+    priority: int     # higher is placed first
+
+
+class Placement(NamedTuple):
+    key: int
+    start: int
+    end: int
+
+
+def working_windows(
+    first_day: datetime.date,
+    days: int,
+    timezone: str,
+    start_hour: int,
+    end_hour: int,
+    working_days: Sequence[int],
+    not_before: datetime.datetime
+) -> List[Window]:
+    """
+    The working hours of `days` days from `first_day` (in `timezone`),
+    limited to `working_days` (0 = Monday) and cut off at `not_before`.
+    """
+    zone = ZoneInfo(timezone)
+    floor = to_minutes(not_before)
+    windows = []
+    for offset in range(days):
+        date = first_day + datetime.timedelta(days=offset)
+        if date.weekday() not in working_days:
+            continue
+        start = to_minutes(datetime.datetime.combine(date, datetime.time(start_hour), zone))
+        end = to_minutes(datetime.datetime.combine(date, datetime.time(0), zone)
+                         + datetime.timedelta(hours=end_hour))
+        start = max(start, floor)
+        if end > start:
+            utc_offset = datetime.datetime.combine(date, datetime.time(12), zone).utcoffset()
+            windows.append(Window(offset, start, end, int(utc_offset.total_seconds() // 60)))
+    return windows
+
+
+class _Day:
+    """Booked intervals of one window, kept sorted by start."""
+
+    def __init__(self, window: Window):
+        self.window = window
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.booked = 0
+
+    def is_free(self, start: int, end: int) -> bool:
+        i = bisect.bisect_left(self.starts, end)
+        # Only the interval starting right before `end` can overlap
+        return i == 0 or self.ends[i - 1] <= start
+
+    def book(self, start: int, end: int) -> None:
+        i = bisect.bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.booked += end - start
+
+
+def _aligned(minute: int, align: int, utc_offset: int) -> int:
+    """Rounds `minute` up to the next multiple of `align` in local time."""
+    local = minute + utc_offset
+    return minute + (-local) % align
+
+
+def pack(
+    items: Sequence[PackingItem],
+    windows: Sequence[Window],
+    style: PackingStyle
+) -> Tuple[List[Placement], Dict[int, int]]:
+    """
+    Places every session it can. Returns the placements (by start time)
+    and, per item key, how many sessions did not fit.
+    """
+    if style.skip_first_day and windows:
+        first = min(window.day for window in windows)
+        # Only if that still leaves a day to plan into
+        if any(window.day != first for window in windows):
+            windows = [window for window in windows if window.day != first]
+    days = [_Day(window) for window in windows]
+    placements: List[Placement] = []
+    unplaced: Dict[int, int] = {}
+
+    ordered = sorted(items, key=lambda item: (-item.priority, -item.duration, item.key))
+    for item in ordered:
+        used_days = set()
+        previous_time_of_day: Optional[int] = None
+        for _ in range(item.sessions):
+            best: Optional[Tuple[float, _Day, int]] = None
+            for day in days:
+                if day.window.day in used_days:
+                    continue
+                window = day.window
+                offset = window.utc_offset
+                latest = window.end - item.duration
+                if latest < window.start:
+                    continue
+                target = window.start + style.target * (latest - window.start)
+                start = _aligned(window.start, style.align_minutes, offset)
+                while start <= latest:
+                    end = start + item.duration
+                    if day.is_free(start - style.buffer_minutes, end + style.buffer_minutes):
+                        cost = (
+                            style.day_weight * window.day
+                            + style.load_weight * day.booked
+                            + style.target_weight * abs(start - target)
+                        )
+                        if previous_time_of_day is not None:
+                            cost += style.repeat_weight * abs((start + offset) % 1440 - previous_time_of_day)
+                        if best is None or cost < best[0]:
+                            best = (cost, day, start)
+                    start += style.align_minutes
+            if best is None:
+                unplaced[item.key] = unplaced.get(item.key, 0) + 1
+                continue
+            _, day, start = best
+            day.book(start, start + item.duration)
+            used_days.add(day.window.day)
+            previous_time_of_day = (start + day.window.utc_offset) % 1440
+            placements.append(Placement(item.key, start, start + item.duration))
+
+    placements.sort(key=lambda placement: placement.start)
+    return placements, unplaced
@@ -0,0 +1,215 @@
+from pydantic import TypeAdapter, ValidationError
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.resilience import UpstreamError
+import json
+import time
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.models.goal import GoalInDB
+from app.models.task import PlannedEvent, TaskEstimate, UnplacedTask, WeekPlan, WeekPlanEstimate
+from app.services.ai_skills.routing import model_router
+from app.services.ai_skills.schema import gemini_schema
+from app.services.ai_skills.week_packer import (
+    PAEI_STYLES,
+    PackingItem,
+    from_minutes,
+    pack,
+    working_windows
+)
+import datetime
+
+# Gemini only estimates the tasks; week_packer decides when they happen
+WEEK_PLAN_SCHEMA = gemini_schema(WeekPlanEstimate)
+# The item docstring is written for developers, not for the model
+WEEK_PLAN_SCHEMA["properties"]["tasks"]["items"].pop("description", None)
+week_plan_estimate_adapter = TypeAdapter(WeekPlanEstimate)
+
+WEEK_PLAN_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": WEEK_PLAN_SCHEMA
+}
+
+# Used for a task the model left out of its reply
+DEFAULT_DURATION_MINUTES = 60
+DEFAULT_PRIORITY = 3
+
+PAEI_ESTIMATION_GUIDANCE = {
+    'P': "You are the (P)RODUCER: results this week come first. Give deliverables and deadlines the "
+         "highest priority and keep sessions tight.",
+    'A': "You are the (A)DMINISTRATOR: order and follow-through come first. Give reviews, planning "
+         "and recurring duties high priority and use standard session lengths (30, 60 or 90 minutes).",
+    'E': "You are the (E)NTREPRENEUR: long-term growth comes first. Give learning, strategy and "
+         "habit-building tasks high priority and generous sessions.",
+    'I': "You are the (I)NTEGRATOR: harmony comes first. Give well-being and people-related tasks "
+         "high priority and keep sessions gentle and short.",
+}
+
+
+class WeekPlanningSkill:
+
+    @staticmethod
+    def _build_prompt(
+        tasks: List[str],
+        goals: List[GoalInDB],
+        personality: str
+    ) -> str:
+        goal_lines = "\n".join(
+            json.dumps({"id": goal.id, "name": goal.name, "avatar": goal.avatar,
+                        "description": (goal.description or "")[:200]})
+            for goal in goals
+        ) or "(none)"
+        task_lines = "\n".join(
+            json.dumps({"index": index, "task": task}) for index, task in enumerate(tasks)
+        )
+        return f"""
+        You are an AI assistant for the 'Present OS'. The user wants to plan their week.
+        For EVERY task below, estimate:
+        - "duration_minutes": how long ONE session takes,
+        - "sessions": how many sessions it needs this week (e.g. 3 for "gym 3 times", otherwise 1),
+        - "priority": 1 (can wait) to 5 (most important this week),
+        - "goal_id": the ID of the user's goal it serves, or null,
+        - a "title" and a "description" that references that goal.
+        Do NOT choose times; they are scheduled separately.
+
+        ---
+        USER'S GOALS:
+        {goal_lines}
+
+        ---
+        TASKS:
+        {task_lines}
+
+        ---
+        {PAEI_ESTIMATION_GUIDANCE.get(personality.upper(), "")}
+        """
+
+    @staticmethod
+    async def estimate_tasks(
+        tasks: List[str],
+        goals: List[GoalInDB],
+        personality: str
+    ) -> List[TaskEstimate]:
+        """
+        One model call for the whole list. Returns one estimate per task,
+        in order; tasks the model skipped get a default estimate.
+        """
+        tier = model_router.choose_tier("plan_week", "\n".join(tasks))
+        json_text = await model_router.generate(
+            "plan_week",
+            [WeekPlanningSkill._build_prompt(tasks, goals, personality)],
+            tier=tier,
+            generation_config=WEEK_PLAN_CONFIG
+        )
+        try:
+            reply = week_plan_estimate_adapter.validate_json(json_text)
+        except ValidationError as e:
+            metrics.inc("gemini_parse_failures_total", skill="plan_week", stage="initial")
+            raise ValueError(f"AI week plan was invalid: {[(err['loc'], err['msg']) for err in e.errors()]}")
+
+        goal_ids = {goal.id for goal in goals}
+        by_index: Dict[int, TaskEstimate] = {}
+        for estimate in reply.tasks:
+            if 0 <= estimate.index < len(tasks) and estimate.index not in by_index:
+                if estimate.goal_id not in goal_ids:
+                    estimate.goal_id = None
+                by_index[estimate.index] = estimate
+
+        estimates = []
+        for index, task in enumerate(tasks):
+            estimate = by_index.get(index)
+            if estimate is None:
+                metrics.inc("plan_week_missing_estimates_total")
+                estimate = TaskEstimate(
+                    index=index, title=task, description=task, goal_id=None,
+                    duration_minutes=DEFAULT_DURATION_MINUTES, sessions=1, priority=DEFAULT_PRIORITY,
+                )
+            if not estimate.title:
+                estimate.title = task
+            estimates.append(estimate)
+        return estimates
+
+    @staticmethod
+    def _working_hours(preferences: Dict[str, Any]) -> Dict[str, Any]:
+        """The user's working hours from their preferences, falling back to settings."""
+        timezone = preferences.get("timezone") or settings.PLAN_WEEK_TIMEZONE
+        try:
+            ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            print(f"Unknown timezone '{timezone}' in preferences; using {settings.PLAN_WEEK_TIMEZONE}")
+            timezone = settings.PLAN_WEEK_TIMEZONE
+
+        start_hour = preferences.get("workday_start_hour", settings.PLAN_WEEK_WORKDAY_START_HOUR)
+        end_hour = preferences.get("workday_end_hour", settings.PLAN_WEEK_WORKDAY_END_HOUR)
+        if not (isinstance(start_hour, int) and isinstance(end_hour, int) and 0 <= start_hour < end_hour <= 24):
+            start_hour, end_hour = settings.PLAN_WEEK_WORKDAY_START_HOUR, settings.PLAN_WEEK_WORKDAY_END_HOUR
+
+        working_days = preferences.get("working_days") or settings.PLAN_WEEK_WORKING_DAYS
+        return {
+            "timezone": timezone,
+            "start_hour": start_hour,
+            "end_hour": end_hour,
+            "working_days": [day for day in working_days if isinstance(day, int) and 0 <= day <= 6],
+        }
+
+    @staticmethod
+    async def plan_week(
+        tasks: List[str],
+        goals: List[GoalInDB],
+        personality: str,
+        preferences: Dict[str, Any],
+        week_start: Optional[datetime.date] = None
+    ) -> WeekPlan:
+        """Estimates the tasks with one model call, then packs them into the week."""
+        try:
+            estimates = await WeekPlanningSkill.estimate_tasks(tasks, goals, personality)
+        except (UpstreamError, ValueError):
+            raise
+        except Exception as e:
+            print(f"Error calling the AI model for week planning: {e}")
+            raise ValueError(f"AI JSON generation failed: {str(e)}")
+
+        started = time.perf_counter()
+        hours = WeekPlanningSkill._working_hours(preferences)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        first_day = week_start or now.astimezone(ZoneInfo(hours["timezone"])).date()
+        windows = working_windows(
+            first_day,
+            settings.PLAN_WEEK_DAYS,
+            hours["timezone"],
+            hours["start_hour"],
+            hours["end_hour"],
+            hours["working_days"],
+            not_before=now + datetime.timedelta(minutes=settings.PLAN_WEEK_LEAD_MINUTES),
+        )
+        placements, unplaced = pack(
+            [PackingItem(e.index, e.duration_minutes, e.sessions, e.priority) for e in estimates],
+            windows,
+            PAEI_STYLES.get(personality.upper(), PAEI_STYLES['A']),
+        )
+        metrics.observe("plan_week_pack_seconds", time.perf_counter() - started)
+
+        events = []
+        session_numbers: Dict[int, int] = {}
+        for placement in placements:
+            estimate = estimates[placement.key]
+            session_numbers[placement.key] = session_numbers.get(placement.key, 0) + 1
+            placed_sessions = estimate.sessions - unplaced.get(placement.key, 0)
+            title = estimate.title
+            if placed_sessions > 1:
+                title = f"{title} ({session_numbers[placement.key]}/{placed_sessions})"
+            events.append(PlannedEvent(
+                task_index=placement.key,
+                title=title,
+                description=estimate.description,
+                goal_id=estimate.goal_id,
+                start_time=from_minutes(placement.start),
+                end_time=from_minutes(placement.end),
+            ))
+        return WeekPlan(
+            events=events,
+            unplaced=[
+                UnplacedTask(task_index=key, title=estimates[key].title, sessions=count)
+                for key, count in sorted(unplaced.items())
+            ],
+        )
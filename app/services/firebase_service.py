@@ -1,11 +1,17 @@
+import time
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, auth
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
+from app.core.executors import ExecutorSaturatedError, run_blocking
+from app.core.metrics import metrics
+from app.core.shared_cache import shared_cache, cache_key
 from app.models.user import User 
-from app.models.goal import GoalInDB # <-- We need this for type hinting
-from typing import List, Dict, Any
+from app.models.goal import GoalInDB, goal_list_adapter
+from app.models.user_context import UserContext
+from app.services.storage import get_storage
+from typing import List, Optional, Tuple
 
 # We must re-format the private key from a single-line string
 # back to a multi-line string with newlines.
@@ -41,16 +47,42 @@ except Exception as e:
     if "already exists" not in str(e):
         print(f"An unexpected error occurred: {e}")
 
-# Get the Firestore client
-db = firestore.client()
-print("Firestore client acquired.")
-
-
 # Define our bearer token security scheme
 oauth2_scheme = HTTPBearer()
 
+# --- Shared cache namespaces ---
+ID_TOKEN_NS = "id_token"
+GOALS_NS = "goals"
+GOALS_VERSION_NS = "goals_version"
+# Version counters must outlive the snapshots they guard
+GOALS_VERSION_TTL_SECONDS = 7 * 24 * 3600
+
+USER_CLAIMS = ("uid", "email", "name", "picture")
+
 # --- Core Authentication Dependency ---
 
+def _verify_id_token_cached(id_token: str) -> dict:
+    """
+    Returns the claims we use from a Firebase ID token, from the shared
+    cache when another worker already verified it.
+    (This is a SYNCHRONOUS function: cache I/O plus, on a miss, the
+    verification itself, which can download signing keys)
+    """
+    token_key = cache_key(id_token)
+    cached_claims = shared_cache.get_secret(ID_TOKEN_NS, token_key)
+    if cached_claims and cached_claims.get("exp", 0) > time.time():
+        return cached_claims
+
+    decoded_token = auth.verify_id_token(id_token)
+
+    # Cache the claims we use, never past the token's own expiry
+    exp = decoded_token.get("exp", 0)
+    claims = {claim: decoded_token.get(claim) for claim in USER_CLAIMS}
+    claims["exp"] = exp
+    ttl = min(settings.CACHE_ID_TOKEN_TTL_SECONDS, exp - time.time())
+    shared_cache.set_secret(ID_TOKEN_NS, token_key, claims, ttl)
+    return claims
+
 async def get_current_user(
     token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
 ) -> User:
@@ -66,14 +98,11 @@ async def get_current_user(
         )
     
     try:
-        decoded_token = auth.verify_id_token(token.credentials)
+        # The cache lookup and the verification both block; one hop covers them
+        claims = await run_blocking("auth", _verify_id_token_cached, token.credentials)
+
         # Populate our User model
-        return User(
-            uid=decoded_token.get("uid"),
-            email=decoded_token.get("email"),
-            name=decoded_token.get("name"),
-            picture=decoded_token.get("picture")
-        )
+        return User(**{claim: claims.get(claim) for claim in USER_CLAIMS})
     except auth.ExpiredIdTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,6 +115,8 @@ async def get_current_user(
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         print(f"An unhandled error occurred during token verification: {e}")
         raise HTTPException(
@@ -93,103 +124,131 @@ async def get_current_user(
             detail="Internal server error during token verification",
         )
 
+# --- Warm-up ---
+
+def prefetch_auth_certificates():
+    """
+    Downloads Firebase's ID-token signing keys through the verifier's own
+    cache-controlled session, so the first token check after a deploy
+    skips the key fetch and TLS handshake.
+    (This is a SYNCHRONOUS function)
+    """
+    from firebase_admin import _token_gen
+
+    verifier = auth._get_client(firebase_admin.get_app())._token_verifier
+    response = verifier.request(
+        _token_gen.ID_TOKEN_CERT_URI, timeout=settings.GOOGLE_TIMEOUT_SECONDS
+    )
+    if response.status != 200:
+        raise Exception(f"Fetching Firebase signing keys returned HTTP {response.status}")
+
 # --- Google Token CRUD ---
+# These functions keep their original signatures; the actual reads and
+# writes go to whichever storage backend is configured (see app/services/storage).
 
 def save_user_google_token(user_id: str, google_refresh_token: str):
     """
-    Saves a user's encrypted Google refresh token to Firestore.
+    Saves a user's encrypted Google refresh token.
     (This is a SYNCHRONOUS function)
     """
-    user_ref = db.collection("users").document(user_id)
-    try:
-        user_ref.set({
-            'google_refresh_token': google_refresh_token
-        }, merge=True)
-        print(f"Successfully saved token for user {user_id}")
-    except Exception as e:
-        print(f"Error saving token to Firestore for user {user_id}: {e}")
-        # We re-raise the exception to be caught by the endpoint
-        raise Exception("Could not save user token to database.")
+    get_storage().save_user_google_token(user_id, google_refresh_token)
 
 def get_user_google_token(user_id: str) -> str:
     """
-    Retrieves a user's encrypted Google refresh token from Firestore.
+    Retrieves a user's encrypted Google refresh token.
     (This is a SYNCHRONOUS function)
     """
-    user_ref = db.collection("users").document(user_id)
-    try:
-        doc = user_ref.get()
-        if doc.exists:
-            data = doc.to_dict()
-            return data.get('google_refresh_token')
-        else:
-            print(f"No document found for user {user_id}")
-            return None
-    except Exception as e:
-        print(f"Error getting token from Firestore for user {user_id}: {e}")
-        raise Exception("Could not retrieve user token from database.")
+    return get_storage().get_user_google_token(user_id)
 
 # --- (NEW) Goal CRUD Functions ---
+# Goal lists are cached host-wide as serialized snapshots. Each user has a
+# version counter that every write bumps; snapshots are keyed by version,
+# so a reader that raced a write can only ever store a snapshot under the
+# old version, which nobody reads again.
+
+def get_user_goals_version(user_id: str) -> int:
+    """
+    Returns the user's goal-list version; it changes on every goal write
+    from any worker. 0 means no version is available.
+    """
+    return shared_cache.get_counter(GOALS_VERSION_NS, user_id)
+
+def _goals_snapshot_key(user_id: str) -> str:
+    return f"{user_id}:{get_user_goals_version(user_id)}"
+
+def _invalidate_user_goals(user_id: str):
+    shared_cache.incr(GOALS_VERSION_NS, user_id, ttl=GOALS_VERSION_TTL_SECONDS)
 
 def create_user_goal(user_id: str, goal_data: dict) -> str:
     """
-    Creates a new goal document for a user in a 'goals' subcollection.
+    Creates a new goal for a user.
     Returns the new goal's ID.
     (This is a SYNCHRONOUS function)
     """
-    try:
-        # We store goals in a subcollection under the user
-        goals_collection_ref = db.collection("users").document(user_id).collection("goals")
-        
-        # Add a new document with a generated ID
-        update_time, doc_ref = goals_collection_ref.add(goal_data)
-        
-        print(f"Successfully created goal {doc_ref.id} for user {user_id}")
-        return doc_ref.id
-    except Exception as e:
-        print(f"Error creating goal in Firestore for user {user_id}: {e}")
-        raise Exception("Could not create goal in database.")
+    goal_id = get_storage().create_user_goal(user_id, goal_data)
+    _invalidate_user_goals(user_id)
+    return goal_id
+
+def create_user_goals_bulk(
+    user_id: str,
+    goals_data: List[dict]
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Creates many goals for a user in as few round trips as possible.
+    Returns one (goal_id, error) pair per input, in order.
+    (This is a SYNCHRONOUS function)
+    """
+    results = get_storage().create_user_goals_bulk(user_id, goals_data)
+    # One invalidation for the whole import, not one per goal
+    if any(goal_id for goal_id, _ in results):
+        _invalidate_user_goals(user_id)
+    return results
 
 def get_user_goals(user_id: str) -> List[GoalInDB]:
     """
     Retrieves all goals for a specific user.
     (This is a SYNCHRONOUS function)
     """
-    try:
-        goals_collection_ref = db.collection("users").document(user_id).collection("goals")
-        docs = goals_collection_ref.stream()
-        
-        goals_list = []
-        for doc in docs:
-            goal_data = doc.to_dict()
-            # Add the document ID and user_id to the data
-            goal_data['id'] = doc.id
-            goal_data['user_id'] = user_id
-            goals_list.append(GoalInDB(**goal_data))
-            
-        return goals_list
-    except Exception as e:
-        print(f"Error retrieving goals from Firestore for user {user_id}: {e}")
-        raise Exception("Could not retrieve goals from database.")
+    snapshot_key = _goals_snapshot_key(user_id)
+    snapshot = shared_cache.get(GOALS_NS, snapshot_key)
+    if snapshot is not None:
+        return goal_list_adapter.validate_json(snapshot)
+
+    goals = get_storage().get_user_goals(user_id)
+    shared_cache.set(
+        GOALS_NS, snapshot_key, goal_list_adapter.dump_json(goals), settings.CACHE_GOALS_TTL_SECONDS
+    )
+    return goals
 
 def get_user_goal(user_id: str, goal_id: str) -> GoalInDB | None:
     """
     Retrieves a single goal for a user by its ID.
     (This is a SYNCHRONOUS function)
     """
-    try:
-        goal_ref = db.collection("users").document(user_id).collection("goals").document(goal_id)
-        doc = goal_ref.get()
-        
-        if not doc.exists:
-            return None
-        
-        goal_data = doc.to_dict()
-        goal_data['id'] = doc.id
-        goal_data['user_id'] = user_id
-        
-        return GoalInDB(**goal_data)
-        
-    except Exception as e:
-        print(f"Error retrieving single goal from Firestore for user {user_id}: {e}")
-        raise Exception("Could not retrieve single goal from database.")
\ No newline at end of file
+    # Serve from the user's cached snapshot when there is one
+    snapshot = shared_cache.get(GOALS_NS, _goals_snapshot_key(user_id))
+    if snapshot is not None:
+        for goal in goal_list_adapter.validate_json(snapshot):
+            if goal.id == goal_id:
+                return goal
+        # The snapshot is current for this version, so the goal doesn't exist
+        return None
+
+    return get_storage().get_user_goal(user_id, goal_id)
+
+# --- User Context ---
+# The token, goal summaries and preferences in one document, kept current
+# by the token and goal writes above (see UserContext). Users created
+# before it existed get theirs built on first read.
+
+def get_user_context(user_id: str) -> UserContext:
+    """
+    Loads everything an action needs about a user, normally in one read.
+    (This is a SYNCHRONOUS function)
+    """
+    storage = get_storage()
+    context = storage.get_user_context(user_id)
+    if context is None:
+        metrics.inc("user_context_rebuilds_total")
+        context = storage.rebuild_user_context(user_id)
+    return context
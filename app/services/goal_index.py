@@ -0,0 +1,165 @@
+"""
+Per-user in-memory vector index over goals.
+
+Lets the actions endpoint work out which goal a task belongs to without
+asking the LLM. Goals are embedded locally with a hashed bag of words and
+character trigrams (no model download, deterministic across processes),
+stored as one contiguous float32 matrix per user, and matched by cosine
+similarity with a single matrix-vector product.
+"""
+
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.goal import GoalInDB
+
+EMBEDDING_DIM = 256
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Whole words carry more meaning than the trigrams that make them up
+_WORD_WEIGHT = 1.0
+_TRIGRAM_WEIGHT = 0.35
+
+
+def _features(text: str) -> Iterable[Tuple[str, float]]:
+    for word in _WORD_RE.findall(text.lower()):
+        yield word, _WORD_WEIGHT
+        # Trigrams make "run"/"running" and "meditate"/"meditation" overlap
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3], _TRIGRAM_WEIGHT
+
+
+def embed_text(text: str) -> np.ndarray:
+    """
+    Embeds `text` into a unit-length float32 vector using signed feature
+    hashing. crc32 (unlike hash()) is stable across processes.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature, weight in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % EMBEDDING_DIM] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def goal_text(goal: GoalInDB) -> str:
+    return " ".join(part for part in (goal.name, goal.description, goal.avatar) if part)
+
+
+class UserGoalIndex:
+    """The goals of one user, as rows of a float32 matrix."""
+
+    def __init__(self, version: int, capacity: int = 8):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.goals: List[GoalInDB] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.goals)
+
+    def add(self, goal: GoalInDB):
+        vector = embed_text(goal_text(goal))
+        position = self._positions.get(goal.id)
+        if position is None:
+            position = len(self.goals)
+            if position == self._matrix.shape[0]:
+                # Grow geometrically so adds stay amortised O(1)
+                grown = np.zeros((position * 2, EMBEDDING_DIM), dtype=np.float32)
+                grown[:position] = self._matrix
+                self._matrix = grown
+            self._positions[goal.id] = position
+            self.goals.append(goal)
+        else:
+            self.goals[position] = goal
+        self._matrix[position] = vector
+
+    def search(self, text: str, k: int = 1) -> List[Tuple[GoalInDB, float]]:
+        """Returns up to `k` (goal, cosine similarity) pairs, best first."""
+        size = len(self.goals)
+        if size == 0:
+            return []
+        scores = self._matrix[:size] @ embed_text(text)
+        k = min(k, size)
+        if k < size:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [(self.goals[i], float(scores[i])) for i in top]
+
+
+class GoalIndexRegistry:
+    """
+    Holds one UserGoalIndex per recently active user (LRU-bounded).
+
+    Each index remembers the user's goal-list version (the shared-cache
+    counter bumped on every goal write, by any worker). An index whose
+    version no longer matches is rebuilt, so goals created through another
+    worker are picked up; `max_age` is the fallback when that counter is
+    unavailable.
+    """
+
+    def __init__(self, max_users: int, max_age: float):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._indexes: "OrderedDict[str, UserGoalIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, version: int) -> Optional[UserGoalIndex]:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return None
+            if index.version != version or time.monotonic() - index.built_at > self.max_age:
+                del self._indexes[user_id]
+                return None
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def build(self, user_id: str, goals: List[GoalInDB], version: int) -> UserGoalIndex:
+        index = UserGoalIndex(version, capacity=max(8, len(goals)))
+        for goal in goals:
+            index.add(goal)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def add_goals(self, user_id: str, goals: List[GoalInDB], previous_version: int, new_version: int):
+        """
+        Applies this worker's own write incrementally. If anything else
+        changed the user's goals in between, the index is dropped instead
+        and rebuilt on next use.
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return
+            # A version of 0 means the shared counter is unavailable;
+            # then only max_age protects against other workers' writes
+            versioned = new_version != 0
+            if versioned and (index.version != previous_version or new_version != previous_version + 1):
+                del self._indexes[user_id]
+                return
+            for goal in goals:
+                index.add(goal)
+            index.version = new_version
+
+
+goal_index = GoalIndexRegistry(
+    max_users=settings.GOAL_INDEX_MAX_USERS,
+    max_age=settings.GOAL_INDEX_MAX_AGE_SECONDS
+)
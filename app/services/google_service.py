@@ -1,18 +1,45 @@
+import functools
+import uuid
 import httpx
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 from app.core.config import settings
-from typing import Dict, Any, List, Optional
+from app.core.shared_cache import shared_cache, cache_key
+from app.core.executors import run_blocking
+from app.core.resilience import call_upstream
+from typing import Dict, Any, List, Optional, Tuple
 import datetime
-import asyncio # Import asyncio
+import time
 
 # This is the scope we're asking for. We want to be able to
 # read/write calendar events.
 GOOGLE_SCOPES = ['https://www.googleapis.com/auth/calendar.events']
 
+# Access tokens are cached host-wide (encrypted) until shortly before they expire
+ACCESS_TOKEN_NS = "google_access_token"
+ACCESS_TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+# One shared session for token refreshes, so its pooled TLS connection
+# to the OAuth endpoint is reused instead of re-handshaking every time
+_auth_request = Request()
+
+# The Calendar API accepts up to 1000 calls per batch request, but
+# recommends keeping batches to 50
+CALENDAR_BATCH_SIZE = 50
+
+# The raw Calendar discovery document. Kept as a string on purpose:
+# googleapiclient fills in method parameters on the parsed dict as it
+# goes, so a parsed copy can't be shared between threads.
+_calendar_discovery_doc: Optional[str] = None
+
 class GoogleService:
     """
     Handles all Google API interactions (OAuth & Calendar).
@@ -22,6 +49,7 @@ class GoogleService:
     def get_google_auth_url(state: str) -> str:
         """
         Generates the Google OAuth 2.0 URL for the user to visit.
+        Building the Flow sets up an OAuth session, so this is a BLOCKING call.
         """
         flow = Flow.from_client_config(
             client_config={
@@ -50,17 +78,27 @@ class GoogleService:
         Exchanges the one-time authorization `code` for an
         `access_token` and `refresh_token`.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "code": code,
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                    "grant_type": "authorization_code",
-                },
-            )
+        async def exchange(timeout: Optional[float]) -> httpx.Response:
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.post(
+                    "https://oauth2.googleapis.com/token",
+                    data={
+                        "code": code,
+                        "client_id": settings.GOOGLE_CLIENT_ID,
+                        "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                        "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+                        "grant_type": "authorization_code",
+                    },
+                )
+            # Let the breaker see server-side failures
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        # An authorization code is single-use, so only retry if it never left
+        response = await call_upstream(
+            "google_oauth", exchange, timeout=settings.GOOGLE_TIMEOUT_SECONDS, idempotent=False
+        )
 
         if response.status_code == 200:
             tokens = response.json()
@@ -72,24 +110,128 @@ class GoogleService:
             return None, None
             
     @staticmethod
-    def _get_calendar_service(user_refresh_token: str):
+    def load_calendar_discovery() -> Optional[str]:
+        """
+        Returns the Calendar v3 discovery document bundled with
+        googleapiclient, read from disk once per process. Returns None if
+        this version doesn't ship it.
+        """
+        global _calendar_discovery_doc
+        if _calendar_discovery_doc is None:
+            _calendar_discovery_doc = get_static_doc("calendar", "v3")
+        return _calendar_discovery_doc
+
+    @staticmethod
+    def warm_calendar_discovery() -> None:
+        """
+        Loads the discovery document and builds a throwaway service from
+        it, so the first real request finds everything imported and cached.
+        This is a BLOCKING call.
+        """
+        discovery_doc = GoogleService.load_calendar_discovery()
+        if discovery_doc is None:
+            raise Exception("Calendar v3 discovery document is not bundled")
+        build_from_document(discovery_doc, http=httplib2.Http()).events()
+
+    @staticmethod
+    def warm_oauth_connection() -> None:
+        """
+        Opens the shared session's TLS connection to the OAuth token
+        endpoint. Any HTTP response means the connection is up.
+        This is a BLOCKING call.
+        """
+        _auth_request(GOOGLE_TOKEN_URI, method="GET", timeout=settings.GOOGLE_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _get_calendar_service(
+        user_refresh_token: str,
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, Credentials]:
         """
         Internal helper to build the Google Calendar service object
-        from a refresh token. This is a BLOCKING call.
+        from a refresh token. Returns the service and its credentials;
+        pass those to _calendar_http for each Calendar call.
+        `timeout` bounds the token refresh. This is a BLOCKING call.
         """
+        timeout = timeout or settings.GOOGLE_TIMEOUT_SECONDS
+        token_key = cache_key(user_refresh_token)
+        cached = shared_cache.get_secret(ACCESS_TOKEN_NS, token_key)
+
         creds = Credentials(
-            None,  
+            cached["token"] if cached else None,
             refresh_token=user_refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
+            token_uri=GOOGLE_TOKEN_URI,
             client_id=settings.GOOGLE_CLIENT_ID,
             client_secret=settings.GOOGLE_CLIENT_SECRET,
             scopes=GOOGLE_SCOPES,
+            # google-auth compares expiry as a naive UTC datetime
+            expiry=(
+                datetime.datetime.fromtimestamp(cached["expiry"], datetime.timezone.utc).replace(tzinfo=None)
+                if cached else None
+            ),
         )
         
-        creds.refresh(Request())
+        # Only hit the OAuth endpoint when no worker has a live access token
+        if not creds.valid:
+            # The default transport timeout is 120s; bound it like every other call
+            creds.refresh(functools.partial(_auth_request, timeout=timeout))
+            if creds.token and creds.expiry:
+                expiry_ts = creds.expiry.replace(tzinfo=datetime.timezone.utc).timestamp()
+                shared_cache.set_secret(
+                    ACCESS_TOKEN_NS,
+                    token_key,
+                    {"token": creds.token, "expiry": expiry_ts},
+                    ttl=expiry_ts - time.time() - ACCESS_TOKEN_EXPIRY_MARGIN_SECONDS,
+                )
         
-        service = build('calendar', 'v3', credentials=creds)
-        return service
+        http = GoogleService._calendar_http(creds, timeout)
+        # Build from the in-memory document instead of re-reading it from disk
+        discovery_doc = GoogleService.load_calendar_discovery()
+        if discovery_doc is not None:
+            service = build_from_document(discovery_doc, http=http)
+        else:
+            service = build('calendar', 'v3', http=http)
+        return service, creds
+
+    @staticmethod
+    def _calendar_http(creds: Credentials, timeout: Optional[float]) -> AuthorizedHttp:
+        """
+        An authorized transport for one Calendar call attempt, bounded by
+        that attempt's timeout (httplib2 has none by default, which would
+        let a stalled call hold a worker thread forever). Every attempt
+        gets its own: httplib2.Http isn't thread-safe, and an attempt that
+        timed out may still be running on the previous one.
+        """
+        return AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout or settings.GOOGLE_TIMEOUT_SECONDS))
+
+    @staticmethod
+    def _event_body(
+        title: str,
+        description: str,
+        start_time: datetime.datetime,
+        end_time: datetime.datetime,
+        recurrence: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        # A client-chosen ID makes the insert safe to retry: a repeat
+        # of an insert that already landed fails with 409 instead of
+        # creating a duplicate event.
+        event = {
+            'id': uuid.uuid4().hex,
+            'summary': title,
+            'description': description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+        }
+
+        if recurrence:
+            event['recurrence'] = recurrence
+        return event
 
     @staticmethod
     async def create_calendar_event(
@@ -105,35 +247,37 @@ class GoogleService:
         Runs blocking I/O calls in a separate thread.
         """
         try:
-            service = await asyncio.to_thread(
-                GoogleService._get_calendar_service, user_refresh_token
+            service, creds = await call_upstream(
+                "google_oauth",
+                lambda timeout: run_blocking(
+                    "google", GoogleService._get_calendar_service, user_refresh_token, timeout
+                ),
+                timeout=settings.GOOGLE_TIMEOUT_SECONDS,
             )
             
-            start_iso = start_time.isoformat()
-            end_iso = end_time.isoformat()
-            
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_iso,
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': end_iso,
-                    'timeZone': 'UTC',
-                },
-            }
-            
-            if recurrence:
-                event['recurrence'] = recurrence
-            
+            event = GoogleService._event_body(title, description, start_time, end_time, recurrence)
+            event_id = event['id']
+
+            def insert_event(timeout: Optional[float]) -> Dict[str, Any]:
+                http = GoogleService._calendar_http(creds, timeout)
+                try:
+                    return service.events().insert(
+                        calendarId='primary', 
+                        body=event
+                    ).execute(http=http, num_retries=0)
+                except HttpError as error:
+                    if error.resp.status != 409:
+                        raise
+                    # An earlier attempt already created it
+                    return service.events().get(
+                        calendarId='primary', eventId=event_id
+                    ).execute(http=http, num_retries=0)
+
             # Call the Calendar API in a thread
-            created_event = await asyncio.to_thread(
-                service.events().insert(
-                    calendarId='primary', 
-                    body=event
-                ).execute
+            created_event = await call_upstream(
+                "google_calendar",
+                lambda timeout: run_blocking("google", insert_event, timeout),
+                timeout=settings.GOOGLE_TIMEOUT_SECONDS,
             )
             
             print(f"Event created: {created_event.get('htmlLink')}")
@@ -144,4 +288,118 @@ class GoogleService:
             raise Exception(f"Google Calendar API error: {error.reason}")
         except Exception as e:
             print(f"Error creating calendar event: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    async def create_calendar_events(
+        user_refresh_token: str,
+        events: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Creates many events in the user's primary Google Calendar with
+        batch requests (CALENDAR_BATCH_SIZE inserts per HTTP round trip).
+        Each item of `events` takes the arguments of create_calendar_event.
+        Returns one result per item, in order: {"event": <created event>,
+        "error": None}, or {"event": None, "error": <reason>} for an item
+        that was not created. Only raises when nothing was created.
+        """
+        try:
+            service, creds = await call_upstream(
+                "google_oauth",
+                lambda timeout: run_blocking(
+                    "google", GoogleService._get_calendar_service, user_refresh_token, timeout
+                ),
+                timeout=settings.GOOGLE_TIMEOUT_SECONDS,
+            )
+
+            bodies = [GoogleService._event_body(**event) for event in events]
+            created: Dict[str, Dict[str, Any]] = {}
+            failed: Dict[str, str] = {}
+
+            def execute_batch(
+                requests: Dict[str, Any],
+                timeout: Optional[float]
+            ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Exception]]:
+                # Replies stay local to this attempt: an attempt that timed
+                # out keeps running in its thread while the retry goes ahead
+                replies: Dict[str, Dict[str, Any]] = {}
+                errors: Dict[str, Exception] = {}
+
+                def on_reply(request_id: str, response: Dict[str, Any], exception: Optional[Exception]):
+                    if exception is None:
+                        replies[request_id] = response
+                    else:
+                        errors[request_id] = exception
+
+                batch = service.new_batch_http_request(callback=on_reply)
+                for event_id, request in requests.items():
+                    batch.add(request, request_id=event_id)
+                batch.execute(http=GoogleService._calendar_http(creds, timeout))
+                return replies, errors
+
+            def insert_batch(chunk: List[Dict[str, Any]], timeout: Optional[float]):
+                return execute_batch({
+                    body['id']: service.events().insert(calendarId='primary', body=body)
+                    for body in chunk
+                }, timeout)
+
+            def get_batch(event_ids: List[str], timeout: Optional[float]):
+                return execute_batch({
+                    event_id: service.events().get(calendarId='primary', eventId=event_id)
+                    for event_id in event_ids
+                }, timeout)
+
+            def record(replies: Dict[str, Dict[str, Any]], errors: Dict[str, Exception]) -> List[str]:
+                """Merges one attempt's outcome; returns the IDs that already existed."""
+                created.update(replies)
+                conflicts = []
+                for event_id, error in errors.items():
+                    if isinstance(error, HttpError) and error.resp.status == 409:
+                        # An earlier attempt already created it
+                        conflicts.append(event_id)
+                    else:
+                        # One bad item doesn't fail the others
+                        failed[event_id] = error.reason if isinstance(error, HttpError) else str(error)
+                return conflicts
+
+            # One call_upstream (and so one timeout and retry budget) per
+            # batch round trip, rather than one for the whole plan
+            for start in range(0, len(bodies), CALENDAR_BATCH_SIZE):
+                chunk = bodies[start:start + CALENDAR_BATCH_SIZE]
+                try:
+                    conflicts = record(*await call_upstream(
+                        "google_calendar",
+                        lambda timeout: run_blocking("google", insert_batch, chunk, timeout),
+                        timeout=settings.GOOGLE_TIMEOUT_SECONDS,
+                    ))
+                    if conflicts:
+                        record(*await call_upstream(
+                            "google_calendar",
+                            lambda timeout: run_blocking("google", get_batch, conflicts, timeout),
+                            timeout=settings.GOOGLE_TIMEOUT_SECONDS,
+                        ))
+                except Exception as e:
+                    if not created:
+                        raise
+                    # Earlier batches landed; report those rather than
+                    # orphan them in the user's calendar
+                    print(f"Calendar batch failed after {len(created)} events were created: {e}")
+                    for body in bodies[start:]:
+                        if body['id'] not in created:
+                            failed.setdefault(body['id'], str(e))
+                    break
+
+            results = [
+                {"event": created[body['id']], "error": None} if body['id'] in created
+                else {"event": None, "error": failed.get(body['id'], "Event was not created.")}
+                for body in bodies
+            ]
+            print(f"Created {len(created)} of {len(bodies)} events")
+            return results
+
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            raise Exception(f"Google Calendar API error: {error.reason}")
+        except Exception as e:
+            print(f"Error creating calendar events: {e}")
+            raise
@@ -0,0 +1,47 @@
+"""
+Pluggable persistence for users and goals.
+
+`get_storage()` returns the backend selected by `settings.STORAGE_BACKEND`
+("firestore" or "sqlite"). It is created on first use and shared by the
+whole process.
+"""
+
+import threading
+from typing import Optional
+from app.core.config import settings
+from app.services.storage.base import StorageBackend
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def _create_storage() -> StorageBackend:
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "firestore":
+        from app.services.storage.firestore_backend import FirestoreStorage
+        return FirestoreStorage()
+    if backend == "sqlite":
+        from app.services.storage.sqlite_backend import SQLiteStorage
+        return SQLiteStorage(settings.SQLITE_PATH, pool_size=settings.SQLITE_POOL_SIZE)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}'")
+
+
+def get_storage() -> StorageBackend:
+    """Returns the process-wide storage backend, creating it if needed."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage()
+                print(f"Using '{_storage.name}' storage backend.")
+    return _storage
+
+
+def set_storage(storage: Optional[StorageBackend]) -> None:
+    """Replaces the process-wide backend (e.g. for tests or benchmarks)."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+
+__all__ = ["StorageBackend", "get_storage", "set_storage"]
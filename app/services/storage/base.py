@@ -0,0 +1,90 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from app.models.goal import GoalInDB
+from app.models.action import ActionRecord
+from app.models.user_context import UserContext
+
+
+class StorageBackend(ABC):
+    """
+    Interface for everything we persist per user: the encrypted Google
+    refresh token, the user's goals, and the user context (a denormalized
+    copy of both, see UserContext). Token and goal writes must update an
+    existing context in the same atomic write.
+    All methods are SYNCHRONOUS; endpoints call them from a worker thread.
+    Implementations raise a plain Exception with a user-safe message on
+    failure, matching the original Firestore functions.
+    """
+
+    name: str = "base"
+
+    # --- Google Token ---
+
+    @abstractmethod
+    def save_user_google_token(self, user_id: str, google_refresh_token: str) -> None:
+        """Saves a user's encrypted Google refresh token."""
+
+    @abstractmethod
+    def get_user_google_token(self, user_id: str) -> Optional[str]:
+        """Returns the user's encrypted Google refresh token, or None."""
+
+    # --- Goals ---
+
+    @abstractmethod
+    def create_user_goal(self, user_id: str, goal_data: dict) -> str:
+        """Creates a goal and returns its new ID."""
+
+    @abstractmethod
+    def create_user_goals_bulk(
+        self,
+        user_id: str,
+        goals_data: List[dict]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Creates many goals; returns one (goal_id, error) pair per input, in order."""
+
+    @abstractmethod
+    def get_user_goals(self, user_id: str) -> List[GoalInDB]:
+        """Returns all of a user's goals."""
+
+    @abstractmethod
+    def get_user_goal(self, user_id: str, goal_id: str) -> Optional[GoalInDB]:
+        """Returns a single goal, or None if it doesn't exist."""
+
+    # --- User Context ---
+
+    @abstractmethod
+    def get_user_context(self, user_id: str) -> Optional[UserContext]:
+        """
+        Returns the user's context in a single read, or None if it has not
+        been built yet (or was built under another CONTEXT_SCHEMA_VERSION).
+        """
+
+    @abstractmethod
+    def rebuild_user_context(self, user_id: str) -> UserContext:
+        """
+        Builds the context from the token and goal records, stores it and
+        returns it. Must not lose token or goal writes that race with it.
+        """
+
+    # --- Action History ---
+
+    @abstractmethod
+    def create_action_records(self, records: List[ActionRecord]) -> None:
+        """Appends a batch of audit records (possibly for many users). Raises on failure."""
+
+    @abstractmethod
+    def get_action_records(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None
+    ) -> List[ActionRecord]:
+        """Returns up to `limit` of a user's records with IDs below `before`, newest first."""
+
+    # --- Lifecycle ---
+
+    def warmup(self) -> None:
+        """Opens connections ahead of the first request. Raises on failure."""
+
+    def close(self) -> None:
+        """Releases any connections held by the backend."""
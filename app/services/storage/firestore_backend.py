@@ -0,0 +1,266 @@
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from typing import List, Optional, Tuple
+from app.models.goal import GoalInDB, goal_adapter, goal_list_adapter
+from app.models.action import ActionRecord, action_record_list_adapter
+from app.models.user_context import (
+    CONTEXT_SCHEMA_VERSION,
+    UserContext,
+    goal_summary,
+    user_context_adapter
+)
+from app.services.storage.base import StorageBackend
+
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+# User-document fields that make up the user context. The token keeps its
+# original field name, so the user document *is* the context document.
+GOAL_SUMMARIES_FIELD = "goal_summaries"
+PREFERENCES_FIELD = "preferences"
+CONTEXT_SCHEMA_FIELD = "context_schema"
+
+
+class FirestoreStorage(StorageBackend):
+    """
+    Stores users in the 'users' collection and their goals in a
+    'goals' subcollection under each user document.
+
+    The user document doubles as the user context: next to the token it
+    holds a summary of every goal, and each token or goal write updates it
+    in the same request (a merge write or a WriteBatch), so the two can't
+    drift apart. Merge writes only ever add fields, so a context rebuild
+    that races with a write can't undo it.
+    """
+
+    name = "firestore"
+
+    def __init__(self):
+        self._db = None
+
+    @property
+    def db(self):
+        # The client is created on first use rather than at import time.
+        # firebase_service initializes the Admin SDK app on import, which
+        # always happens before the first request reaches us.
+        if self._db is None:
+            self._db = firestore.client()
+            print("Firestore client acquired.")
+        return self._db
+
+    def warmup(self) -> None:
+        # A one-document read sets up the gRPC channel and auth token
+        list(self.db.collection("users").limit(1).stream())
+
+    # --- Google Token CRUD ---
+
+    def _user_ref(self, user_id: str):
+        return self.db.collection("users").document(user_id)
+
+    @staticmethod
+    def _context_update(goal_summaries: dict) -> dict:
+        """Merge-write fields that add goal summaries to the context."""
+        # An empty map would replace the stored one rather than merge into it
+        return {GOAL_SUMMARIES_FIELD: goal_summaries} if goal_summaries else {}
+
+    def save_user_google_token(self, user_id: str, google_refresh_token: str) -> None:
+        user_ref = self._user_ref(user_id)
+        try:
+            user_ref.set({'google_refresh_token': google_refresh_token}, merge=True)
+            print(f"Successfully saved token for user {user_id}")
+        except Exception as e:
+            print(f"Error saving token to Firestore for user {user_id}: {e}")
+            # We re-raise the exception to be caught by the endpoint
+            raise Exception("Could not save user token to database.")
+
+    def get_user_google_token(self, user_id: str) -> Optional[str]:
+        user_ref = self._user_ref(user_id)
+        try:
+            doc = user_ref.get()
+            if doc.exists:
+                data = doc.to_dict()
+                return data.get('google_refresh_token')
+            else:
+                print(f"No document found for user {user_id}")
+                return None
+        except Exception as e:
+            print(f"Error getting token from Firestore for user {user_id}: {e}")
+            raise Exception("Could not retrieve user token from database.")
+
+    # --- Goal CRUD ---
+
+    def create_user_goal(self, user_id: str, goal_data: dict) -> str:
+        try:
+            # We store goals in a subcollection under the user
+            user_ref = self._user_ref(user_id)
+
+            # The goal and its summary in the user context commit together;
+            # document() generates the goal's ID client-side
+            doc_ref = user_ref.collection("goals").document()
+            batch = self.db.batch()
+            batch.set(doc_ref, goal_data)
+            batch.set(user_ref, self._context_update({doc_ref.id: goal_summary(goal_data)}), merge=True)
+            batch.commit()
+
+            print(f"Successfully created goal {doc_ref.id} for user {user_id}")
+            return doc_ref.id
+        except Exception as e:
+            print(f"Error creating goal in Firestore for user {user_id}: {e}")
+            raise Exception("Could not create goal in database.")
+
+    def create_user_goals_bulk(
+        self,
+        user_id: str,
+        goals_data: List[dict]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        The goals are committed in chunks of FIRESTORE_BATCH_LIMIT, so one
+        round trip covers up to 499 goals (plus their summaries in the user
+        context) instead of one.
+        """
+        user_ref = self._user_ref(user_id)
+        goals_collection_ref = user_ref.collection("goals")
+        results: List[Tuple[Optional[str], Optional[str]]] = []
+        # One write of every batch goes to the user document
+        chunk_size = FIRESTORE_BATCH_LIMIT - 1
+
+        for start in range(0, len(goals_data), chunk_size):
+            chunk = goals_data[start:start + chunk_size]
+            try:
+                batch = self.db.batch()
+                doc_refs = []
+                summaries = {}
+                for goal_data in chunk:
+                    # document() with no ID generates one client-side,
+                    # so we know every ID before the commit
+                    doc_ref = goals_collection_ref.document()
+                    batch.set(doc_ref, goal_data)
+                    doc_refs.append(doc_ref)
+                    summaries[doc_ref.id] = goal_summary(goal_data)
+                batch.set(user_ref, self._context_update(summaries), merge=True)
+                batch.commit()
+                results.extend((doc_ref.id, None) for doc_ref in doc_refs)
+            except Exception as e:
+                # A batch is atomic: if the commit fails, none of its goals exist
+                print(f"Error committing goal batch to Firestore for user {user_id}: {e}")
+                results.extend((None, "Could not create goal in database.") for _ in chunk)
+
+        created = sum(1 for goal_id, _ in results if goal_id)
+        print(f"Bulk created {created}/{len(goals_data)} goals for user {user_id}")
+        return results
+
+    def get_user_goals(self, user_id: str) -> List[GoalInDB]:
+        try:
+            goals_collection_ref = self.db.collection("users").document(user_id).collection("goals")
+            docs = goals_collection_ref.stream()
+
+            raw_goals = []
+            for doc in docs:
+                goal_data = doc.to_dict()
+                # Add the document ID and user_id to the data
+                goal_data['id'] = doc.id
+                goal_data['user_id'] = user_id
+                raw_goals.append(goal_data)
+
+            # Validate the whole list in one pass with the pre-built adapter
+            return goal_list_adapter.validate_python(raw_goals)
+        except Exception as e:
+            print(f"Error retrieving goals from Firestore for user {user_id}: {e}")
+            raise Exception("Could not retrieve goals from database.")
+
+    def get_user_goal(self, user_id: str, goal_id: str) -> Optional[GoalInDB]:
+        try:
+            goal_ref = self.db.collection("users").document(user_id).collection("goals").document(goal_id)
+            doc = goal_ref.get()
+
+            if not doc.exists:
+                return None
+
+            goal_data = doc.to_dict()
+            goal_data['id'] = doc.id
+            goal_data['user_id'] = user_id
+
+            return goal_adapter.validate_python(goal_data)
+
+        except Exception as e:
+            print(f"Error retrieving single goal from Firestore for user {user_id}: {e}")
+            raise Exception("Could not retrieve single goal from database.")
+
+    # --- User Context ---
+
+    @staticmethod
+    def _context_from_doc(user_id: str, data: dict) -> UserContext:
+        return user_context_adapter.validate_python({
+            "user_id": user_id,
+            "google_refresh_token": data.get("google_refresh_token"),
+            "goals": data.get(GOAL_SUMMARIES_FIELD) or {},
+            "preferences": data.get(PREFERENCES_FIELD) or {},
+        })
+
+    def get_user_context(self, user_id: str) -> Optional[UserContext]:
+        try:
+            doc = self._user_ref(user_id).get()
+        except Exception as e:
+            print(f"Error getting user context from Firestore for user {user_id}: {e}")
+            raise Exception("Could not retrieve user context from database.")
+        data = doc.to_dict() if doc.exists else None
+        # Documents written before the context existed only hold the token
+        if not data or data.get(CONTEXT_SCHEMA_FIELD) != CONTEXT_SCHEMA_VERSION:
+            return None
+        return self._context_from_doc(user_id, data)
+
+    def rebuild_user_context(self, user_id: str) -> UserContext:
+        """
+        Merges a summary of every goal into the user document, then reads
+        it back. Goals are never removed, so merging (rather than replacing
+        the map) keeps any summary a concurrent goal write just added.
+        """
+        goals = self.get_user_goals(user_id)
+        user_ref = self._user_ref(user_id)
+        try:
+            user_ref.set({
+                CONTEXT_SCHEMA_FIELD: CONTEXT_SCHEMA_VERSION,
+                **self._context_update({goal.id: goal_summary(goal.model_dump()) for goal in goals}),
+            }, merge=True)
+            doc = user_ref.get()
+        except Exception as e:
+            print(f"Error rebuilding user context in Firestore for user {user_id}: {e}")
+            raise Exception("Could not rebuild user context in database.")
+        print(f"Rebuilt user context for user {user_id} ({len(goals)} goals)")
+        return self._context_from_doc(user_id, doc.to_dict() or {})
+
+    # --- Action History ---
+
+    def _actions_collection(self, user_id: str):
+        return self.db.collection("users").document(user_id).collection("actions")
+
+    def create_action_records(self, records: List[ActionRecord]) -> None:
+        """One WriteBatch per FIRESTORE_BATCH_LIMIT records, across users."""
+        try:
+            for start in range(0, len(records), FIRESTORE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for record in records[start:start + FIRESTORE_BATCH_LIMIT]:
+                    doc_ref = self._actions_collection(record.user_id).document(record.id)
+                    batch.set(doc_ref, record.model_dump())
+                batch.commit()
+        except Exception as e:
+            print(f"Error writing action records to Firestore: {e}")
+            raise Exception("Could not save action history to database.")
+
+    def get_action_records(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None
+    ) -> List[ActionRecord]:
+        try:
+            query = self._actions_collection(user_id).order_by(
+                "id", direction=firestore.Query.DESCENDING
+            )
+            if before:
+                query = query.where(filter=FieldFilter("id", "<", before))
+            docs = query.limit(limit).stream()
+            return action_record_list_adapter.validate_python([doc.to_dict() for doc in docs])
+        except Exception as e:
+            print(f"Error retrieving action history from Firestore for user {user_id}: {e}")
+            raise Exception("Could not retrieve action history from database.")
@@ -0,0 +1,408 @@
+import json
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+from app.models.goal import GoalBase, GoalInDB, goal_adapter, goal_list_adapter
+from app.models.action import ActionRecord, action_record_adapter
+from app.models.user_context import (
+    CONTEXT_SCHEMA_VERSION,
+    UserContext,
+    goal_summary,
+    user_context_adapter
+)
+from app.services.storage.base import StorageBackend
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    google_refresh_token TEXT
+);
+CREATE TABLE IF NOT EXISTS goals (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    avatar TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_goals_user_created ON goals (user_id, created_at);
+CREATE TABLE IF NOT EXISTS actions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_user_id ON actions (user_id, id);
+CREATE TABLE IF NOT EXISTS user_context (
+    user_id TEXT PRIMARY KEY,
+    schema INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+_GOAL_COLUMNS = "id, user_id, name, description, avatar"
+
+# How long a caller waits on a full pool before checking again whether a
+# slot was given back by a failed connect
+_POOL_WAIT_SECONDS = 0.5
+
+
+def _new_goal_id() -> str:
+    """A random 20-character ID, the same shape Firestore generates."""
+    return secrets.token_hex(10)
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    A single-file SQLite backend for one-box deployments and load testing.
+
+    The database runs in WAL mode so readers never block the writer, and
+    connections are kept in a small pool so each call skips the connect and
+    PRAGMA setup. Every per-user query is served by an index.
+
+    The user context is a JSON row in `user_context`, updated in the same
+    transaction as the token or goal write it reflects.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, pool_size: int = 8, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._pool_size = pool_size
+        self._lock = threading.Lock()
+        self._closed = False
+
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    # --- Connection pool ---
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None puts the connection in autocommit mode;
+        # multi-statement writes open their own transaction explicitly.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and
+        # avoids an fsync on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _open_reserved(self) -> sqlite3.Connection:
+        """Opens a connection for a slot already counted in `_created`."""
+        try:
+            return self._connect()
+        except Exception:
+            # Give the slot back, or the pool would wait on a connection
+            # that will never exist
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self._pool_size
+                if can_create:
+                    self._created += 1
+            # Open a new connection while under the cap, otherwise wait for one
+            if can_create:
+                return self._open_reserved()
+            try:
+                return self._pool.get(timeout=_POOL_WAIT_SECONDS)
+            except queue.Empty:
+                continue
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        if self._closed:
+            raise RuntimeError("SQLite storage has been closed.")
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A pooled connection inside BEGIN IMMEDIATE ... COMMIT (or ROLLBACK)."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def warmup(self) -> None:
+        # Fill the pool so early requests don't pay for connect + PRAGMAs
+        for _ in range(self._pool_size - self._created):
+            with self._lock:
+                if self._created >= self._pool_size:
+                    break
+                self._created += 1
+            conn = self._open_reserved()
+            conn.execute("SELECT 1 FROM goals LIMIT 1").fetchall()
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # --- Google Token CRUD ---
+
+    def save_user_google_token(self, user_id: str, google_refresh_token: str) -> None:
+        def set_token(context: UserContext):
+            context.google_refresh_token = google_refresh_token
+
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (user_id, google_refresh_token) VALUES (?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET google_refresh_token = excluded.google_refresh_token",
+                    (user_id, google_refresh_token),
+                )
+                self._update_context(conn, user_id, set_token)
+            print(f"Successfully saved token for user {user_id}")
+        except Exception as e:
+            print(f"Error saving token to SQLite for user {user_id}: {e}")
+            raise Exception("Could not save user token to database.")
+
+    def get_user_google_token(self, user_id: str) -> Optional[str]:
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT google_refresh_token FROM users WHERE user_id = ?", (user_id,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Error getting token from SQLite for user {user_id}: {e}")
+            raise Exception("Could not retrieve user token from database.")
+        if row is None:
+            print(f"No document found for user {user_id}")
+            return None
+        return row["google_refresh_token"]
+
+    # --- Goal CRUD ---
+
+    @staticmethod
+    def _goal_row(user_id: str, goal_id: str, goal_data: dict, created_at: float) -> tuple:
+        return (
+            goal_id,
+            user_id,
+            goal_data.get("name"),
+            goal_data.get("description"),
+            goal_data.get("avatar"),
+            created_at,
+        )
+
+    def create_user_goal(self, user_id: str, goal_data: dict) -> str:
+        goal_id = _new_goal_id()
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    f"INSERT INTO goals ({_GOAL_COLUMNS}, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    self._goal_row(user_id, goal_id, goal_data, time.time()),
+                )
+                self._update_context(conn, user_id, self._add_goal_summaries({goal_id: goal_data}))
+            print(f"Successfully created goal {goal_id} for user {user_id}")
+            return goal_id
+        except Exception as e:
+            print(f"Error creating goal in SQLite for user {user_id}: {e}")
+            raise Exception("Could not create goal in database.")
+
+    def create_user_goals_bulk(
+        self,
+        user_id: str,
+        goals_data: List[dict]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """All goals are inserted in a single transaction."""
+        now = time.time()
+        goal_ids = [_new_goal_id() for _ in goals_data]
+        # Nudge created_at so the import keeps its order when listed
+        rows = [
+            self._goal_row(user_id, goal_id, goal_data, now + i * 1e-6)
+            for i, (goal_id, goal_data) in enumerate(zip(goal_ids, goals_data))
+        ]
+        try:
+            with self._transaction() as conn:
+                conn.executemany(
+                    f"INSERT INTO goals ({_GOAL_COLUMNS}, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._update_context(
+                    conn, user_id, self._add_goal_summaries(dict(zip(goal_ids, goals_data)))
+                )
+        except Exception as e:
+            print(f"Error bulk creating goals in SQLite for user {user_id}: {e}")
+            return [(None, "Could not create goal in database.") for _ in goals_data]
+
+        print(f"Bulk created {len(goal_ids)}/{len(goals_data)} goals for user {user_id}")
+        return [(goal_id, None) for goal_id in goal_ids]
+
+    def get_user_goals(self, user_id: str) -> List[GoalInDB]:
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {_GOAL_COLUMNS} FROM goals WHERE user_id = ? ORDER BY created_at",
+                    (user_id,),
+                ).fetchall()
+            return goal_list_adapter.validate_python([dict(row) for row in rows])
+        except Exception as e:
+            print(f"Error retrieving goals from SQLite for user {user_id}: {e}")
+            raise Exception("Could not retrieve goals from database.")
+
+    def get_user_goal(self, user_id: str, goal_id: str) -> Optional[GoalInDB]:
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    f"SELECT {_GOAL_COLUMNS} FROM goals WHERE id = ? AND user_id = ?",
+                    (goal_id, user_id),
+                ).fetchone()
+            if row is None:
+                return None
+            return goal_adapter.validate_python(dict(row))
+        except Exception as e:
+            print(f"Error retrieving single goal from SQLite for user {user_id}: {e}")
+            raise Exception("Could not retrieve single goal from database.")
+
+    # --- User Context ---
+
+    @staticmethod
+    def _add_goal_summaries(goals_by_id: dict) -> Callable[[UserContext], None]:
+        def add(context: UserContext):
+            for goal_id, goal_data in goals_by_id.items():
+                context.goals[goal_id] = GoalBase.model_construct(**goal_summary(goal_data))
+        return add
+
+    @staticmethod
+    def _read_context(conn: sqlite3.Connection, user_id: str) -> Optional[UserContext]:
+        row = conn.execute(
+            "SELECT schema, data FROM user_context WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None or row["schema"] != CONTEXT_SCHEMA_VERSION:
+            return None
+        return user_context_adapter.validate_json(row["data"])
+
+    @staticmethod
+    def _write_context(conn: sqlite3.Connection, context: UserContext) -> None:
+        conn.execute(
+            "INSERT INTO user_context (user_id, schema, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET schema = excluded.schema, data = excluded.data",
+            (context.user_id, CONTEXT_SCHEMA_VERSION, user_context_adapter.dump_json(context).decode()),
+        )
+
+    def _update_context(
+        self,
+        conn: sqlite3.Connection,
+        user_id: str,
+        apply: Callable[[UserContext], None]
+    ) -> None:
+        """
+        Applies a write to the user's context, inside the caller's transaction.
+        A user without a (current) context is left alone; it is built from
+        the tables, this write included, on its next read.
+        """
+        context = self._read_context(conn, user_id)
+        if context is None:
+            return
+        apply(context)
+        self._write_context(conn, context)
+
+    def get_user_context(self, user_id: str) -> Optional[UserContext]:
+        try:
+            with self._connection() as conn:
+                return self._read_context(conn, user_id)
+        except Exception as e:
+            print(f"Error getting user context from SQLite for user {user_id}: {e}")
+            raise Exception("Could not retrieve user context from database.")
+
+    def rebuild_user_context(self, user_id: str) -> UserContext:
+        """Reads the token and goals and writes the context in one transaction."""
+        try:
+            with self._transaction() as conn:
+                previous = conn.execute(
+                    "SELECT data FROM user_context WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                token = conn.execute(
+                    "SELECT google_refresh_token FROM users WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                goals = conn.execute(
+                    f"SELECT {_GOAL_COLUMNS} FROM goals WHERE user_id = ? ORDER BY created_at",
+                    (user_id,),
+                ).fetchall()
+                # Parsed loosely: the previous row may be of another schema
+                previous = json.loads(previous["data"]) if previous else {}
+                context = UserContext(
+                    user_id=user_id,
+                    google_refresh_token=token["google_refresh_token"] if token else None,
+                    goals={goal["id"]: goal_summary(dict(goal)) for goal in goals},
+                    preferences=previous.get("preferences") or {},
+                )
+                self._write_context(conn, context)
+        except Exception as e:
+            print(f"Error rebuilding user context in SQLite for user {user_id}: {e}")
+            raise Exception("Could not rebuild user context in database.")
+        print(f"Rebuilt user context for user {user_id} ({len(goals)} goals)")
+        return context
+
+    # --- Action History ---
+
+    def create_action_records(self, records: List[ActionRecord]) -> None:
+        """All records are inserted in a single transaction."""
+        rows = [
+            (record.id, record.user_id, action_record_adapter.dump_json(record).decode())
+            for record in records
+        ]
+        try:
+            with self._transaction() as conn:
+                # A retried flush may repeat records that already landed
+                conn.executemany(
+                    "INSERT OR IGNORE INTO actions (id, user_id, data) VALUES (?, ?, ?)", rows
+                )
+        except Exception as e:
+            print(f"Error writing action records to SQLite: {e}")
+            raise Exception("Could not save action history to database.")
+
+    def get_action_records(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[str] = None
+    ) -> List[ActionRecord]:
+        try:
+            with self._connection() as conn:
+                if before:
+                    rows = conn.execute(
+                        "SELECT data FROM actions WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                        (user_id, before, limit),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT data FROM actions WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                        (user_id, limit),
+                    ).fetchall()
+            return [action_record_adapter.validate_json(row["data"]) for row in rows]
+        except Exception as e:
+            print(f"Error retrieving action history from SQLite for user {user_id}: {e}")
+            raise Exception("Could not retrieve action history from database.")
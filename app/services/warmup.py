@@ -0,0 +1,188 @@
+"""
+Startup warm-up.
+
+A fresh worker pays for Firebase's signing-key download, the Firestore
+gRPC channel, the Calendar discovery build and the first TLS handshakes
+to Google and Gemini on its first requests. `run_warmup()` does all of
+that concurrently at startup and records how each step went in
+`warmup_state`, which backs the `/health/ready` probe.
+
+Required steps must succeed before the worker reports ready. Optional
+steps only warm a connection: if one fails, the first real request
+simply pays the cold-start cost itself.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.executors import run_blocking
+from app.core.metrics import metrics
+from app.models.user import User
+from app.services import firebase_service
+from app.services.google_service import GoogleService
+from app.services.storage import get_storage
+from app.services.ai_skills.routing import model_router
+
+
+class WarmupStep:
+    """One dependency to prime, with the outcome of the last attempt."""
+
+    def __init__(self, name: str, run: Callable[[], Awaitable[Any]], required: bool):
+        self.name = name
+        self.run = run
+        self.required = required
+        self.status = "pending"  # pending -> ok | failed
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "required": self.required,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+        }
+
+
+class WarmupState:
+    """Progress of the warm-up phase for this worker process."""
+
+    def __init__(self):
+        self.steps: Dict[str, WarmupStep] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.skipped = False
+
+    @property
+    def finished(self) -> bool:
+        return self.skipped or self.finished_at is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(
+            step.status == "ok" for step in self.steps.values() if step.required
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.skipped:
+            phase = "skipped"
+        elif self.finished_at is not None:
+            phase = "finished"
+        else:
+            phase = "running" if self.started_at is not None else "not_started"
+        duration_ms = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration_ms = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "warmup": phase,
+            "warmup_ms": duration_ms,
+            "dependencies": {name: step.to_dict() for name, step in self.steps.items()},
+        }
+
+
+warmup_state = WarmupState()
+
+
+# --- Steps ---
+
+async def _warm_storage():
+    await run_blocking("storage", get_storage().warmup)
+
+
+def _prime_user_model():
+    # The first EmailStr validation imports idna's large mapping table,
+    # which would otherwise stall the event loop on the first request
+    User(uid="warmup", email="warmup@example.com")
+
+
+async def _warm_firebase_auth():
+    # Looked up at call time so the load-test harness can swap it out
+    await run_blocking("auth", firebase_service.prefetch_auth_certificates)
+    await run_blocking("auth", _prime_user_model)
+
+
+async def _warm_calendar_discovery():
+    await run_blocking("google", GoogleService.warm_calendar_discovery)
+
+
+async def _warm_google_oauth():
+    await run_blocking("google", GoogleService.warm_oauth_connection)
+
+
+async def _warm_llm():
+    # Every model tier the router may pick
+    await model_router.warmup()
+
+
+def _default_steps() -> List[WarmupStep]:
+    return [
+        WarmupStep("storage", _warm_storage, required=True),
+        WarmupStep("firebase_auth", _warm_firebase_auth, required=True),
+        WarmupStep("calendar_discovery", _warm_calendar_discovery, required=False),
+        WarmupStep("google_oauth", _warm_google_oauth, required=False),
+        WarmupStep("llm", _warm_llm, required=False),
+    ]
+
+
+async def _run_step(step: WarmupStep, timeout: float):
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(step.run(), timeout)
+        step.status = "ok"
+        step.error = None
+    except asyncio.TimeoutError:
+        step.status = "failed"
+        step.error = f"timed out after {timeout:g}s"
+    except Exception as e:
+        step.status = "failed"
+        step.error = str(e) or type(e).__name__
+    finally:
+        elapsed = time.perf_counter() - started
+        step.latency_ms = round(elapsed * 1000, 1)
+        metrics.set("warmup_step_seconds", elapsed, step=step.name)
+        metrics.set("warmup_step_ok", 1.0 if step.status == "ok" else 0.0, step=step.name)
+    if step.status == "ok":
+        print(f"Warm-up: {step.name} ready in {step.latency_ms}ms")
+    else:
+        print(f"Warm-up: {step.name} failed after {step.latency_ms}ms: {step.error}")
+
+
+async def run_warmup(
+    steps: Optional[List[WarmupStep]] = None,
+    timeout: Optional[float] = None,
+    retry_interval: Optional[float] = None,
+    state: WarmupState = warmup_state,
+) -> WarmupState:
+    """
+    Runs every warm-up step concurrently, each bounded by `timeout`.
+    Failed required steps are then retried every `retry_interval`
+    seconds until they pass (0 disables retries), so a worker that
+    started during an upstream blip becomes ready on its own.
+    Never raises: failures are recorded on the step instead.
+    """
+    timeout = settings.WARMUP_STEP_TIMEOUT_SECONDS if timeout is None else timeout
+    if retry_interval is None:
+        retry_interval = settings.WARMUP_RETRY_SECONDS
+    steps = _default_steps() if steps is None else steps
+    state.steps = {step.name: step for step in steps}
+    state.started_at = time.perf_counter()
+    state.finished_at = None
+
+    await asyncio.gather(*(_run_step(step, timeout) for step in steps))
+
+    state.finished_at = time.perf_counter()
+    metrics.set("warmup_ready", 1.0 if state.ready else 0.0)
+
+    while not state.ready and retry_interval > 0:
+        await asyncio.sleep(retry_interval)
+        failed = [step for step in steps if step.required and step.status != "ok"]
+        await asyncio.gather(*(_run_step(step, timeout) for step in failed))
+        metrics.set("warmup_ready", 1.0 if state.ready else 0.0)
+    return state
+
+
+def skip_warmup(state: WarmupState = warmup_state):
+    """Marks the worker ready without priming anything (WARMUP_ENABLED=False)."""
+    state.skipped = True
@@ -0,0 +1,83 @@
+"""
+Microbenchmark for the list-goals serialization path.
+
+Compares the old path (validate in the service, re-validate through
+`response_model`, `jsonable_encoder`, stdlib json) against the fast path
+(one validation pass with the pre-built adapter, pydantic-core dump_json).
+
+Run from the repo root:
+    python -m benchmarks.bench_goal_serialization
+"""
+
+import argparse
+import json
+import statistics
+import timeit
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.goal import GoalInDB, goal_list_adapter
+
+SIZES = (10, 100, 1000)
+
+
+def make_firestore_dicts(n: int) -> List[dict]:
+    """Builds `n` goal dicts shaped like Firestore `doc.to_dict()` output."""
+    return [
+        {
+            "id": f"goal{i:016d}",
+            "user_id": "bench-user",
+            "name": f"Goal number {i}",
+            "description": "Run three times a week and sleep eight hours a night.",
+            "avatar": "Warrior" if i % 2 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_path(raw: List[dict]) -> bytes:
+    """What the endpoint used to do: validate twice, encode generically."""
+    goals = [GoalInDB(**d) for d in raw]                    # service
+    validated = goal_list_adapter.validate_python(          # response_model
+        [g.model_dump() for g in goals]
+    )
+    body = jsonable_encoder(validated)
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(raw: List[dict]) -> bytes:
+    """One validation pass from Firestore dicts straight to wire bytes."""
+    return goal_list_adapter.dump_json(goal_list_adapter.validate_python(raw))
+
+
+def measure(fn: Callable[[List[dict]], bytes], raw: List[dict], repeat: int) -> float:
+    """Returns the best-of-`repeat` time per call, in seconds."""
+    number = max(1, 20_000 // len(raw))
+    timings = timeit.repeat(lambda: fn(raw), number=number, repeat=repeat)
+    return min(timings) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'goals':>6} {'legacy us':>11} {'fast us':>9} {'speedup':>8} {'goals/s (fast)':>15}")
+    speedups = []
+    for n in SIZES:
+        raw = make_firestore_dicts(n)
+        assert json.loads(legacy_path(raw)) == json.loads(fast_path(raw))
+
+        legacy = measure(legacy_path, raw, args.repeat)
+        fast = measure(fast_path, raw, args.repeat)
+        speedups.append(legacy / fast)
+        print(
+            f"{n:>6} {legacy * 1e6:>11.1f} {fast * 1e6:>9.1f} "
+            f"{legacy / fast:>7.2f}x {n / fast:>15,.0f}"
+        )
+    print(f"median speedup: {statistics.median(speedups):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
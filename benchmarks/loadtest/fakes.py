@@ -0,0 +1,557 @@
+"""
+In-process fakes for every upstream the API talks to.
+
+Each fake sleeps for a latency drawn from a configurable distribution and
+fails at a configurable rate, and records how long it took under a stage
+name (e.g. "firestore.get", "gemini") so the load test can report where the
+time went. Nothing here touches the network.
+"""
+
+import asyncio
+import contextvars
+import datetime
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httplib2
+import httpx
+from google.api_core import exceptions as gexc
+from google.auth import exceptions as gauth_exc
+from googleapiclient.errors import HttpError
+
+# The route the current request belongs to. The driver sets it before each
+# request; it flows into the app's task and into `asyncio.to_thread` workers.
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_route", default="-"
+)
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z99 = 2.326
+
+
+@dataclass
+class LatencyModel:
+    """
+    A latency distribution plus an error rate for one fake backend.
+
+    dist:      "const", "uniform" (median_ms +/- spread up to p99_ms) or
+               "lognormal" (parameterised by its median and p99).
+    """
+    median_ms: float = 0.0
+    p99_ms: Optional[float] = None
+    dist: str = "lognormal"
+    error_rate: float = 0.0
+
+    def sample(self) -> float:
+        """Returns one latency draw, in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        p99 = self.p99_ms if self.p99_ms is not None else self.median_ms * 3
+        if self.dist == "const" or p99 <= self.median_ms:
+            ms = self.median_ms
+        elif self.dist == "uniform":
+            ms = random.uniform(2 * self.median_ms - p99, p99)
+        elif self.dist == "lognormal":
+            sigma = math.log(p99 / self.median_ms) / _Z99
+            ms = random.lognormvariate(math.log(self.median_ms), sigma)
+        else:
+            raise ValueError(f"Unknown latency distribution '{self.dist}'")
+        return max(ms, 0.0) / 1000.0
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        Parses "dist:median_ms[:p99_ms[:error_rate]]",
+        e.g. "lognormal:8:40:0.01" or "const:0".
+        """
+        parts = spec.split(":")
+        dist = parts[0]
+        median = float(parts[1]) if len(parts) > 1 else 0.0
+        p99 = float(parts[2]) if len(parts) > 2 and parts[2] else None
+        error_rate = float(parts[3]) if len(parts) > 3 else 0.0
+        return cls(median_ms=median, p99_ms=p99, dist=dist, error_rate=error_rate)
+
+
+@dataclass
+class FakeBackendConfig:
+    """Latency/error settings for every simulated upstream."""
+    auth: LatencyModel = field(default_factory=lambda: LatencyModel(0.3, 1.0))
+    firestore: LatencyModel = field(default_factory=lambda: LatencyModel(8, 40))
+    gemini: LatencyModel = field(default_factory=lambda: LatencyModel(900, 3000))
+    google_oauth: LatencyModel = field(default_factory=lambda: LatencyModel(60, 250))
+    google_calendar: LatencyModel = field(default_factory=lambda: LatencyModel(150, 600))
+
+
+class StageRecorder:
+    """Collects (route, stage) -> [durations] from every fake."""
+
+    def __init__(self):
+        self._samples: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        key = (current_route.get(), stage)
+        # list.append is atomic under the GIL, so no lock is needed
+        self._samples[key].append(seconds)
+        if failed:
+            self._errors[key] += 1
+
+    def samples(self) -> Dict[Tuple[str, str], List[float]]:
+        return dict(self._samples)
+
+    def errors(self) -> Dict[Tuple[str, str], int]:
+        return dict(self._errors)
+
+    def reset(self):
+        self._samples.clear()
+        self._errors.clear()
+
+
+recorder = StageRecorder()
+
+
+def _blocking_call(stage: str, model: LatencyModel, error: Exception):
+    """Simulates a blocking upstream call (runs in a worker thread)."""
+    delay = model.sample()
+    failed = model.should_fail()
+    time.sleep(delay)
+    recorder.record(stage, delay, failed)
+    if failed:
+        raise error
+
+
+async def _async_call(stage: str, model: LatencyModel, error: Exception):
+    """Simulates a non-blocking upstream call (awaited on the event loop)."""
+    delay = model.sample()
+    failed = model.should_fail()
+    await asyncio.sleep(delay)
+    recorder.record(stage, delay, failed)
+    if failed:
+        raise error
+
+
+# --- Firebase Auth ---
+
+class FakeAuth:
+    """Stands in for `firebase_admin.auth.verify_id_token`."""
+
+    def __init__(self, config: FakeBackendConfig):
+        self.config = config
+
+    def verify_id_token(self, id_token: str, *args, **kwargs) -> dict:
+        # Tokens are simply the UID; anything can log in.
+        _blocking_call("auth.verify", self.config.auth, ValueError("Fake auth failure"))
+        now = int(time.time())
+        return {
+            "uid": id_token,
+            "email": f"{id_token}@example.com",
+            "name": id_token,
+            "iat": now,
+            "exp": now + 3600,
+        }
+
+    def prefetch_certificates(self) -> None:
+        # Stands in for `firebase_service.prefetch_auth_certificates`
+        _blocking_call("auth.certs", self.config.auth, ValueError("Fake auth failure"))
+
+
+# --- Firestore ---
+
+class _FakeStore:
+    """Thread-safe path -> document dict storage shared by all references."""
+
+    def __init__(self):
+        self.docs: Dict[Tuple[str, ...], dict] = {}
+        self.lock = threading.Lock()
+
+    def children(self, collection_path: Tuple[str, ...]) -> List[Tuple[str, dict]]:
+        depth = len(collection_path) + 1
+        with self.lock:
+            return [
+                (path[-1], dict(data))
+                for path, data in self.docs.items()
+                if len(path) == depth and path[:-1] == collection_path
+            ]
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        return (self._data or {}).get(field_path)
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestoreClient", path: Tuple[str, ...]):
+        self._client = client
+        self.path_tuple = path
+        self.id = path[-1]
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, self.path_tuple + (name,))
+
+    def get(self, *args, **kwargs) -> FakeSnapshot:
+        self._client._call("firestore.get")
+        return self._read()
+
+    def set(self, data: dict, merge: bool = False):
+        self._client._call("firestore.set")
+        self._write(data, merge)
+
+    def update(self, data: dict):
+        self._client._call("firestore.update")
+        self._write(data, merge=True)
+
+    def delete(self):
+        self._client._call("firestore.delete")
+        with self._client.store.lock:
+            self._client.store.docs.pop(self.path_tuple, None)
+
+    def _read(self) -> FakeSnapshot:
+        with self._client.store.lock:
+            data = self._client.store.docs.get(self.path_tuple)
+            return FakeSnapshot(self, dict(data) if data is not None else None)
+
+    def _write(self, data: dict, merge: bool):
+        store = self._client.store
+        with store.lock:
+            existing = store.docs.get(self.path_tuple) if merge else None
+            merged = dict(existing or {})
+            for key, value in data.items():
+                # Support dotted field paths like "goal_summaries.abc"
+                target = merged
+                parts = key.split(".")
+                for part in parts[:-1]:
+                    target = target.setdefault(part, {})
+                current = target.get(parts[-1])
+                target[parts[-1]] = _resolve_transform(current, value)
+            store.docs[self.path_tuple] = merged
+
+
+def _resolve_transform(current: Any, value: Any) -> Any:
+    """Applies Firestore sentinel transforms (Increment, SERVER_TIMESTAMP)."""
+    kind = type(value).__name__
+    if kind == "Increment":
+        return (current or 0) + value.value
+    if kind == "Sentinel" and "SERVER_TIMESTAMP" in repr(value):
+        return datetime.datetime.now(datetime.timezone.utc)
+    if isinstance(value, dict) and current is not None and isinstance(current, dict):
+        merged = dict(current)
+        for k, v in value.items():
+            merged[k] = _resolve_transform(merged.get(k), v)
+        return merged
+    return value
+
+
+class FakeQuery:
+    def __init__(self, collection: "FakeCollectionReference"):
+        self._collection = collection
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._orders: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._start_after: Optional[dict] = None
+
+    def where(self, field_path: str = None, op_string: str = None, value: Any = None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        self._filters.append((field_path, op_string, value))
+        return self
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        self._orders.append((field_path, direction == "DESCENDING"))
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def start_after(self, values: dict):
+        self._start_after = values
+        return self
+
+    def stream(self, *args, **kwargs):
+        client = self._collection._client
+        client._call("firestore.query")
+        rows = client.store.children(self._collection.path_tuple)
+        ops = {
+            "==": lambda a, b: a == b, "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+            ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+        }
+        rows = [
+            (doc_id, data) for doc_id, data in rows
+            if all(ops[op](data.get(f), v) for f, op, v in self._filters)
+        ]
+        for field_path, descending in reversed(self._orders):
+            rows.sort(key=lambda row: row[1].get(field_path), reverse=descending)
+        if self._start_after and self._orders:
+            field_path, descending = self._orders[0]
+            pivot = self._start_after[field_path]
+            rows = [
+                row for row in rows
+                if (row[1].get(field_path) < pivot if descending else row[1].get(field_path) > pivot)
+            ]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        for doc_id, data in rows:
+            yield FakeSnapshot(self._collection.document(doc_id), data)
+
+
+class FakeCollectionReference:
+    def __init__(self, client: "FakeFirestoreClient", path: Tuple[str, ...]):
+        self._client = client
+        self.path_tuple = path
+        self.id = path[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(
+            self._client, self.path_tuple + (document_id or uuid.uuid4().hex[:20],)
+        )
+
+    def add(self, data: dict, document_id: Optional[str] = None):
+        doc_ref = self.document(document_id)
+        doc_ref.set(data)
+        return datetime.datetime.now(datetime.timezone.utc), doc_ref
+
+    def stream(self, *args, **kwargs):
+        return FakeQuery(self).stream()
+
+    def where(self, *args, **kwargs) -> FakeQuery:
+        return FakeQuery(self).where(*args, **kwargs)
+
+    def order_by(self, *args, **kwargs) -> FakeQuery:
+        return FakeQuery(self).order_by(*args, **kwargs)
+
+    def limit(self, count: int) -> FakeQuery:
+        return FakeQuery(self).limit(count)
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestoreClient"):
+        self._client = client
+        self._writes: List[Tuple[FakeDocumentReference, dict, bool]] = []
+
+    def set(self, reference: FakeDocumentReference, data: dict, merge: bool = False):
+        self._writes.append((reference, data, merge))
+        return self
+
+    def update(self, reference: FakeDocumentReference, data: dict):
+        self._writes.append((reference, data, True))
+        return self
+
+    def commit(self, *args, **kwargs):
+        self._client._call("firestore.commit")
+        for reference, data, merge in self._writes:
+            reference._write(data, merge)
+        return []
+
+
+class FakeFirestoreClient:
+    """An in-memory stand-in for `google.cloud.firestore.Client`."""
+
+    def __init__(self, config: FakeBackendConfig):
+        self.config = config
+        self.store = _FakeStore()
+
+    def _call(self, stage: str):
+        _blocking_call(stage, self.config.firestore, gexc.ServiceUnavailable("Fake Firestore outage"))
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, (name,))
+
+    def document(self, path: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, tuple(path.split("/")))
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def seed(self, path: str, data: dict):
+        """Writes a document directly, without latency or failures."""
+        with self.store.lock:
+            self.store.docs[tuple(path.split("/"))] = dict(data)
+
+
+# --- Gemini ---
+
+class _FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Stands in for `genai.GenerativeModel`. Replies with a valid event, or,
+    when asked for a week plan, an estimate for every task in the prompt.
+    """
+
+    def __init__(self, config: FakeBackendConfig):
+        self.config = config
+
+    def _event_json(self) -> str:
+        start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+        return json.dumps({
+            "title": "Load test task",
+            "description": "Generated by the fake Gemini model.",
+            "duration_minutes": 30,
+            "start_time_iso": start.replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+            "recurrence_rrule": None,
+        })
+
+    def _week_plan_json(self, contents) -> str:
+        indices = re.findall(r'"index": (\d+)', " ".join(str(part) for part in contents))
+        return json.dumps({"tasks": [
+            {
+                "index": int(index),
+                "title": f"Load test task {index}",
+                "description": "Estimated by the fake Gemini model.",
+                "goal_id": None,
+                "duration_minutes": 60,
+                "sessions": 2,
+                "priority": 3,
+            }
+            for index in indices
+        ]})
+
+    async def generate_content_async(self, contents, *args, generation_config=None, **kwargs) -> _FakeGeminiResponse:
+        await _async_call("gemini", self.config.gemini, gexc.ServiceUnavailable("Fake Gemini outage"))
+        schema = (generation_config or {}).get("response_schema") or {}
+        if "tasks" in schema.get("properties", {}):
+            return _FakeGeminiResponse(self._week_plan_json(contents))
+        return _FakeGeminiResponse(self._event_json())
+
+    async def count_tokens_async(self, contents, *args, **kwargs):
+        await _async_call("gemini.count_tokens", self.config.gemini, gexc.ServiceUnavailable("Fake Gemini outage"))
+        return None
+
+
+# --- Google Calendar & OAuth ---
+
+def _calendar_outage() -> HttpError:
+    return HttpError(httplib2.Response({"status": 503}), b'{"error": "Fake Calendar outage"}')
+
+
+class _FakeRequest:
+    def __init__(self, stage: str, model: LatencyModel, result: dict):
+        self._stage = stage
+        self._model = model
+        self._result = result
+
+    def execute(self, *args, **kwargs) -> dict:
+        _blocking_call(self._stage, self._model, _calendar_outage())
+        return self._result
+
+
+class _FakeEvents:
+    def __init__(self, config: FakeBackendConfig):
+        self._config = config
+
+    def insert(self, calendarId: str, body: dict, **kwargs) -> _FakeRequest:
+        event_id = body.get("id") or uuid.uuid4().hex
+        result = dict(body, id=event_id, htmlLink=f"https://calendar.example/event?eid={event_id}")
+        return _FakeRequest("google.calendar_insert", self._config.google_calendar, result)
+
+    def get(self, calendarId: str, eventId: str, **kwargs) -> _FakeRequest:
+        result = {"id": eventId, "htmlLink": f"https://calendar.example/event?eid={eventId}"}
+        return _FakeRequest("google.calendar_get", self._config.google_calendar, result)
+
+
+class _FakeBatch:
+    """Stands in for `BatchHttpRequest`: one latency draw for the whole batch."""
+
+    def __init__(self, config: FakeBackendConfig, callback=None):
+        self._config = config
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request: _FakeRequest, callback=None, request_id: Optional[str] = None):
+        request_id = request_id or str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback or self._callback))
+
+    def execute(self, *args, **kwargs):
+        _blocking_call("google.calendar_batch", self._config.google_calendar, _calendar_outage())
+        for request_id, request, callback in self._requests:
+            callback(request_id, request._result, None)
+
+
+class FakeCalendarService:
+    """Stands in for the `build('calendar', 'v3')` resource."""
+
+    def __init__(self, config: FakeBackendConfig):
+        self._config = config
+
+    def events(self) -> _FakeEvents:
+        return _FakeEvents(self._config)
+
+    def new_batch_http_request(self, callback=None) -> _FakeBatch:
+        return _FakeBatch(self._config, callback)
+
+
+def fake_credentials_refresh(config: FakeBackendConfig):
+    """
+    Returns a replacement for `Credentials.refresh`: one google_oauth draw,
+    then a fresh access token valid for an hour.
+    """
+    def refresh(self, request):
+        _blocking_call("google.oauth_refresh", config.google_oauth, gauth_exc.TransportError("Fake OAuth outage"))
+        self.token = f"access-{uuid.uuid4().hex}"
+        # google-auth keeps expiry as a naive UTC datetime
+        self.expiry = (
+            datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            + datetime.timedelta(hours=1)
+        )
+    return refresh
+
+
+def fake_build_factory(config: FakeBackendConfig):
+    """
+    Returns a replacement for `googleapiclient.discovery.build` and
+    `build_from_document`.
+    """
+    def build(*args, **kwargs) -> FakeCalendarService:
+        return FakeCalendarService(config)
+    return build
+
+
+def fake_oauth_connect(config: FakeBackendConfig):
+    """Returns a replacement for `GoogleService.warm_oauth_connection`."""
+    def connect() -> None:
+        _blocking_call("google.oauth_connect", config.google_oauth, gauth_exc.TransportError("Fake OAuth outage"))
+    return connect
+
+
+def fake_oauth_transport(config: FakeBackendConfig) -> httpx.AsyncBaseTransport:
+    """An httpx transport answering the OAuth token endpoint locally."""
+
+    class _Transport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            delay = config.google_oauth.sample()
+            failed = config.google_oauth.should_fail()
+            await asyncio.sleep(delay)
+            recorder.record("google.oauth_token", delay, failed)
+            if failed:
+                return httpx.Response(503, json={"error": "unavailable"}, request=request)
+            return httpx.Response(200, json={
+                "access_token": f"access-{uuid.uuid4().hex}",
+                "refresh_token": f"refresh-{uuid.uuid4().hex}",
+                "expires_in": 3599,
+                "token_type": "Bearer",
+            }, request=request)
+
+    return _Transport()
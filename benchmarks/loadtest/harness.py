@@ -0,0 +1,193 @@
+"""
+Boots `app.main` against the in-process fakes.
+
+`boot_app()` must run before anything imports `app.*`: the Firebase service
+initialises the Admin SDK and grabs a Firestore client at import time, so the
+fakes have to be in place first. The patches stay active for the life of the
+process.
+"""
+
+import functools
+import os
+import socket
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+
+import httpx
+
+from benchmarks.loadtest.fakes import (
+    FakeAuth,
+    FakeBackendConfig,
+    FakeFirestoreClient,
+    FakeGeminiModel,
+    fake_build_factory,
+    fake_credentials_refresh,
+    fake_oauth_connect,
+    fake_oauth_transport,
+    recorder,
+)
+
+# Dummy values for every required setting; real env vars still win.
+FAKE_ENV = {
+    "SECRET_KEY": "00" * 32,
+    "FRONTEND_URL": "http://localhost:3000",
+    "GEMINI_API_KEY": "fake-gemini-key",
+    "GOOGLE_CLIENT_ID": "fake-client-id",
+    "GOOGLE_CLIENT_SECRET": "fake-client-secret",
+    "GOOGLE_REDIRECT_URI": "http://localhost:8000/api/v1/auth/google/callback",
+    "FIREBASE_PROJECT_ID": "fake-project",
+    "FIREBASE_CLIENT_EMAIL": "loadtest@fake-project.iam.gserviceaccount.com",
+    "FIREBASE_PRIVATE_KEY": "fake-private-key",
+    "FIREBASE_WEB_API_KEY": "fake-web-api-key",
+}
+
+
+class NetworkAccessError(RuntimeError):
+    """Raised when code under load test tries to reach the network."""
+
+
+def install_network_guard():
+    """Makes any outbound TCP/UDP connection fail loudly."""
+    real_connect = socket.socket.connect
+    real_connect_ex = socket.socket.connect_ex
+
+    def _check(sock: socket.socket, address):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            raise NetworkAccessError(f"Network access attempted during load test: {address!r}")
+
+    def guarded_connect(sock, address):
+        _check(sock, address)
+        return real_connect(sock, address)
+
+    def guarded_connect_ex(sock, address):
+        _check(sock, address)
+        return real_connect_ex(sock, address)
+
+    def guarded_getaddrinfo(host, *args, **kwargs):
+        raise NetworkAccessError(f"DNS lookup attempted during load test: {host!r}")
+
+    socket.socket.connect = guarded_connect
+    socket.socket.connect_ex = guarded_connect_ex
+    socket.getaddrinfo = guarded_getaddrinfo
+
+
+class TimedStorage:
+    """
+    Wraps the app's storage backend and records every call as a
+    "storage.<method>" stage, so Firestore and SQLite runs can be compared
+    like for like.
+    """
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.name = inner.name
+
+    def __getattr__(self, attr):
+        value = getattr(self._inner, attr)
+        if not callable(value) or attr.startswith("_"):
+            return value
+
+        @functools.wraps(value)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            try:
+                return value(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                recorder.record(f"storage.{attr}", time.perf_counter() - started, failed)
+        return timed
+
+
+def boot_app(
+    config: FakeBackendConfig,
+    block_network: bool = True,
+    storage: str = "firestore",
+    sqlite_path: Optional[str] = None,
+) -> Tuple[object, FakeFirestoreClient]:
+    """
+    Imports the FastAPI app with every upstream replaced by a fake.
+    `storage` picks the app's backend: the fake Firestore or a real SQLite
+    file at `sqlite_path`.
+    Returns (app, fake_firestore_client).
+    """
+    for key, value in FAKE_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["STORAGE_BACKEND"] = storage
+    if sqlite_path:
+        os.environ["SQLITE_PATH"] = sqlite_path
+    # A private shared cache, so runs never see each other's entries
+    os.environ["SHARED_CACHE_PATH"] = os.path.join(
+        tempfile.mkdtemp(prefix="loadtest-cache-"), "shared_cache.db"
+    )
+    if block_network:
+        install_network_guard()
+
+    fake_db = FakeFirestoreClient(config)
+    fake_auth = FakeAuth(config)
+    for patcher in (
+        mock.patch("firebase_admin.credentials.Certificate", return_value=mock.MagicMock()),
+        mock.patch("firebase_admin.initialize_app", return_value=mock.MagicMock()),
+        mock.patch("firebase_admin.firestore.client", return_value=fake_db),
+        mock.patch("firebase_admin.auth.verify_id_token", fake_auth.verify_id_token),
+    ):
+        patcher.start()
+
+    from app.main import app
+    from app.services import firebase_service, google_service
+    from app.services.storage import get_storage, set_storage
+    from app.services.ai_skills.routing import model_router
+
+    # Both model tiers share one fake; the router logic stays real
+    fake_model = FakeGeminiModel(config)
+    for provider in model_router.providers():
+        provider.model = fake_model
+    # Keep GoogleService's own logic (incl. access-token caching) and fake
+    # only the OAuth refresh and the discovery build underneath it
+    google_service.Credentials.refresh = fake_credentials_refresh(config)
+    google_service.build = google_service.build_from_document = fake_build_factory(config)
+    # Warm-up steps that would otherwise reach Google
+    firebase_service.prefetch_auth_certificates = fake_auth.prefetch_certificates
+    google_service.GoogleService.warm_oauth_connection = staticmethod(fake_oauth_connect(config))
+    # Route the OAuth token exchange through a local transport
+    transport = fake_oauth_transport(config)
+    google_service.httpx = SimpleNamespace(
+        AsyncClient=lambda *args, **kwargs: httpx.AsyncClient(*args, transport=transport, **kwargs)
+    )
+    set_storage(TimedStorage(get_storage()))
+    return app, fake_db
+
+
+def seed_users(fake_db: FakeFirestoreClient, users: int, goals_per_user: int) -> Dict[str, List[str]]:
+    """
+    Gives every synthetic user a Calendar token and a few goals.
+    Returns the goal IDs created for each user.
+    """
+    from app.core.security import TokenSecurity
+    from app.services.storage import get_storage
+
+    storage = get_storage()
+    goal_ids: Dict[str, List[str]] = {}
+    for u in range(users):
+        uid = f"user-{u}"
+        encrypted = TokenSecurity.encrypt(f"refresh-token-{uid}")
+        goals = [
+            {"name": f"Goal {g}", "description": "Seeded by the load test.", "avatar": "Warrior"}
+            for g in range(goals_per_user)
+        ]
+        if storage.name == "firestore":
+            # Write straight into the fake so seeding pays no simulated latency
+            fake_db.seed(f"users/{uid}", {"google_refresh_token": encrypted})
+            goal_ids[uid] = []
+            for g, goal in enumerate(goals):
+                fake_db.seed(f"users/{uid}/goals/goal-{g}", goal)
+                goal_ids[uid].append(f"goal-{g}")
+        else:
+            storage.save_user_google_token(uid, encrypted)
+            goal_ids[uid] = [goal_id for goal_id, _ in storage.create_user_goals_bulk(uid, goals)]
+    return goal_ids
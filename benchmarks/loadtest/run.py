@@ -0,0 +1,335 @@
+"""
+Offline load test for the API.
+
+Boots the app against in-process fakes (no network), drives the goal and
+action routes at a fixed arrival rate, and reports throughput plus
+p50/p95/p99 latency per route and per upstream stage.
+
+Run from the repo root:
+    python -m benchmarks.loadtest.run --rps 50 --duration 20
+    python -m benchmarks.loadtest.run --storage sqlite
+    python -m benchmarks.loadtest.run --latency gemini=lognormal:400:1500:0.02
+    python -m benchmarks.loadtest.run --mix "POST /actions=1" --mix "POST /actions plan_week=1"
+    python -m benchmarks.loadtest.run --save baseline.json
+    python -m benchmarks.loadtest.run --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.loadtest.fakes import (
+    FakeBackendConfig,
+    LatencyModel,
+    current_route,
+    recorder,
+)
+from benchmarks.loadtest.harness import boot_app, seed_users
+
+API = "/api/v1"
+
+# route name -> default share of traffic
+DEFAULT_MIX = {
+    "GET /goals": 0.45,
+    "GET /goals/{id}": 0.15,
+    "POST /goals": 0.15,
+    "POST /actions": 0.25,
+}
+
+# Every route _send knows; the extra ones are opt-in through --mix
+ROUTES = list(DEFAULT_MIX) + ["POST /actions plan_week"]
+
+
+@dataclass
+class Result:
+    route: str
+    seconds: float
+    status: Optional[int]
+    lateness: float
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+    }
+
+
+async def _send(client: httpx.AsyncClient, route: str, goal_ids: Dict[str, List[str]]) -> httpx.Response:
+    uid = random.choice(list(goal_ids))
+    headers = {"Authorization": f"Bearer {uid}"}
+    goal_id = random.choice(goal_ids[uid])
+
+    if route == "GET /goals":
+        return await client.get(f"{API}/goals/", headers=headers)
+    if route == "GET /goals/{id}":
+        return await client.get(f"{API}/goals/{goal_id}", headers=headers)
+    if route == "POST /goals":
+        return await client.post(f"{API}/goals/", headers=headers, json={
+            "name": "Load test goal", "description": "Created under load", "avatar": "Lover",
+        })
+    if route == "POST /actions":
+        return await client.post(f"{API}/actions/", headers=headers, json={
+            "task_type": "schedule_task",
+            "payload": {
+                "task_prompt": "go to the gym for an hour",
+                "goal_id": goal_id,
+                "personality": random.choice("PAEI"),
+            },
+        })
+    if route == "POST /actions plan_week":
+        return await client.post(f"{API}/actions/", headers=headers, json={
+            "task_type": "plan_week",
+            "payload": {
+                "tasks": ["gym session", "write the weekly report", "call mom", "read a book"],
+                "personality": random.choice("PAEI"),
+            },
+        })
+    raise ValueError(f"Unknown route '{route}'")
+
+
+async def _one(client, route, scheduled_at, goal_ids) -> Result:
+    current_route.set(route)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        response = await _send(client, route, goal_ids)
+        status = response.status_code
+    except Exception as e:
+        print(f"[loadtest] {route} raised {type(e).__name__}: {e}", file=sys.stderr)
+        status = None
+    return Result(route, loop.time() - started, status, started - scheduled_at)
+
+
+async def drive(app, rps: float, duration: float, mix: Dict[str, float], goal_ids: Dict[str, List[str]]):
+    """Open-loop driver: request i is launched at t0 + i / rps regardless of backlog."""
+    routes = list(mix)
+    weights = [mix[r] for r in routes]
+    total = int(rps * duration)
+    loop = asyncio.get_running_loop()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        tasks = []
+        t0 = loop.time()
+        for i in range(total):
+            scheduled_at = t0 + i / rps
+            delay = scheduled_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            route = random.choices(routes, weights)[0]
+            tasks.append(asyncio.create_task(_one(client, route, scheduled_at, goal_ids)))
+        results = await asyncio.gather(*tasks)
+        elapsed = loop.time() - t0
+    return results, elapsed
+
+
+async def watched_drive(app, *args):
+    """
+    Starts the app like a server would (lifespan and warm-up), then runs
+    `drive` under the event-loop watchdog. Returns the results plus any
+    block reports.
+    """
+    from app.core.loop_watchdog import loop_watchdog
+    from app.services.warmup import warmup_state
+
+    async with app.router.lifespan_context(app):
+        while not warmup_state.finished:
+            await asyncio.sleep(0.01)
+        # Only the load itself goes into the report
+        recorder.reset()
+        loop_watchdog.start()
+        loop_watchdog.reports.clear()
+        results, elapsed = await drive(app, *args)
+        blocks = list(loop_watchdog.reports)
+    return results, elapsed, blocks
+
+
+def build_report(results: List[Result], elapsed: float) -> dict:
+    by_route: Dict[str, List[Result]] = defaultdict(list)
+    for result in results:
+        by_route[result.route].append(result)
+
+    routes = {}
+    for route, items in sorted(by_route.items()):
+        stats = summarize([r.seconds for r in items])
+        stats["errors"] = sum(1 for r in items if r.status is None or r.status >= 400)
+        stats["rps"] = len(items) / elapsed
+        stats["max_lateness_ms"] = max(r.lateness for r in items) * 1000
+        routes[route] = stats
+
+    stages = {}
+    errors = recorder.errors()
+    for (route, stage), values in sorted(recorder.samples().items()):
+        stats = summarize(values)
+        stats["errors"] = errors.get((route, stage), 0)
+        stages[f"{route} :: {stage}"] = stats
+
+    return {
+        "elapsed_s": elapsed,
+        "requests": len(results),
+        "throughput_rps": len(results) / elapsed,
+        "routes": routes,
+        "stages": stages,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"-> {report['throughput_rps']:.1f} req/s\n")
+    header = f"{'':<52} {'count':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print("ROUTES")
+    print(header)
+    for route, s in report["routes"].items():
+        print(f"{route:<52} {s['count']:>6} {s['errors']:>5} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}"
+              f"   ({s['rps']:.1f} req/s)")
+    print("\nSTAGES")
+    print(header)
+    for name, s in report["stages"].items():
+        print(f"{name:<52} {s['count']:>6} {s['errors']:>5} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Returns one message per route whose p95 regressed beyond `tolerance`."""
+    regressions = []
+    for route, stats in report["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if not base or base["p95_ms"] <= 0:
+            continue
+        ratio = stats["p95_ms"] / base["p95_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{route}: p95 {stats['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test with simulated upstreams.")
+    parser.add_argument("--rps", type=float, default=50.0, help="Target arrival rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--goals-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for repeatable runs")
+    parser.add_argument(
+        "--mix", action="append", default=[], metavar="ROUTE=WEIGHT",
+        help=f"Traffic share per route, e.g. 'POST /actions=0.5'. Routes: {', '.join(ROUTES)}"
+    )
+    parser.add_argument(
+        "--latency", action="append", default=[], metavar="BACKEND=SPEC",
+        help="Backend latency as dist:median_ms[:p99_ms[:error_rate]], "
+             "e.g. 'firestore=lognormal:8:40:0.01'. Backends: auth, firestore, gemini, "
+             "google_oauth, google_calendar"
+    )
+    parser.add_argument(
+        "--storage", choices=("firestore", "sqlite"), default="firestore",
+        help="App storage backend: the simulated Firestore or a temporary SQLite file"
+    )
+    parser.add_argument(
+        "--strict-loop", action="store_true",
+        help="Fail the run if the event-loop watchdog catches a blocking call"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output during the run")
+    parser.add_argument("--allow-network", action="store_true", help="Don't block outbound sockets")
+    parser.add_argument("--save", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Baseline JSON report to check p95 regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    config = FakeBackendConfig()
+    for spec in args.latency:
+        backend, _, model = spec.partition("=")
+        if not hasattr(config, backend):
+            raise SystemExit(f"Unknown backend '{backend}'")
+        setattr(config, backend, LatencyModel.parse(model))
+
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        mix = {}
+        for spec in args.mix:
+            route, _, weight = spec.rpartition("=")
+            if route not in ROUTES:
+                raise SystemExit(f"Unknown route '{route}'")
+            mix[route] = float(weight)
+
+    sqlite_dir = tempfile.TemporaryDirectory() if args.storage == "sqlite" else None
+    app, fake_db = boot_app(
+        config,
+        block_network=not args.allow_network,
+        storage=args.storage,
+        sqlite_path=os.path.join(sqlite_dir.name, "loadtest.db") if sqlite_dir else None,
+    )
+    goal_ids = seed_users(fake_db, args.users, args.goals_per_user)
+    recorder.reset()
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        # The app prints a line per write; keep the report readable
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+        with quiet:
+            results, elapsed, blocks = asyncio.run(
+                watched_drive(app, args.rps, args.duration, mix, goal_ids)
+            )
+    report = build_report(results, elapsed)
+    report["loop_blocks"] = [block.to_dict() for block in blocks]
+    report["config"] = {"rps": args.rps, "duration": args.duration, "mix": mix, "storage": args.storage,
+                        "wall_s": time.perf_counter() - started}
+    print_report(report)
+    if blocks:
+        print(f"\nEVENT LOOP BLOCKED {len(blocks)} time(s); first at:")
+        print("".join(blocks[0].stack[-8:]))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.save}")
+
+    if args.strict_loop and blocks:
+        print("Failing: --strict-loop is set and the event loop was blocked.")
+        return 1
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo p95 regressions beyond tolerance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
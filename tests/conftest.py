@@ -0,0 +1,16 @@
+import os
+
+# Settings requires these at import time; the tests never reach the services
+for name, value in {
+    "SECRET_KEY": "ab" * 32,
+    "FRONTEND_URL": "http://localhost:3000",
+    "GEMINI_API_KEY": "test",
+    "GOOGLE_CLIENT_ID": "test",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+    "FIREBASE_PROJECT_ID": "test",
+    "FIREBASE_CLIENT_EMAIL": "test@example.com",
+    "FIREBASE_PRIVATE_KEY": "test",
+    "FIREBASE_WEB_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
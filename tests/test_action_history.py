@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from app.models.action import ActionRecord
+from app.services import action_log as action_log_module
+from app.services.action_log import ActionLog, get_action_history
+from app.services.storage import set_storage
+from app.services.storage.sqlite_backend import SQLiteStorage
+
+
+def _record(number: int, user_id: str = "user-1") -> ActionRecord:
+    return ActionRecord(
+        id=f"{number:020d}{'0' * 12}",
+        user_id=user_id,
+        task_type="schedule_task",
+        status="succeeded",
+        status_code=201,
+        task_prompt=f"task {number}",
+        created_at=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "history.db"), pool_size=2)
+    set_storage(storage)
+    yield storage
+    set_storage(None)
+    storage.close()
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    log = ActionLog(batch_size=100, flush_interval=60, max_buffer=100)
+    monkeypatch.setattr(action_log_module, "action_log", log)
+    return log
+
+
+def _pages(user_id: str, limit: int):
+    """Walks the whole history; returns the record numbers of each page."""
+    pages, cursor = [], None
+    while True:
+        page, cursor = get_action_history(user_id, limit, cursor)
+        pages.append([int(record.id[:20]) for record in page])
+        if cursor is None:
+            return pages
+
+
+def test_stored_and_buffered_records_are_merged_newest_first(storage, buffer):
+    storage.create_action_records([_record(n) for n in (1, 3, 5, 7)])
+    for n in (2, 4, 6, 8):
+        buffer.record(_record(n))
+    assert _pages("user-1", 3) == [[8, 7, 6], [5, 4, 3], [2, 1]]
+
+
+def test_a_record_both_buffered_and_stored_is_listed_once(storage, buffer):
+    # A flush has written the records but not yet cleared them from the buffer
+    storage.create_action_records([_record(n) for n in (1, 2, 3)])
+    for n in (2, 3, 4):
+        buffer.record(_record(n))
+    assert _pages("user-1", 2) == [[4, 3], [2, 1]]
+
+
+def test_the_last_full_page_has_no_cursor(storage, buffer):
+    storage.create_action_records([_record(n) for n in (1, 2)])
+    buffer.record(_record(3))
+    assert _pages("user-1", 3) == [[3, 2, 1]]
+
+
+def test_other_users_records_are_left_out(storage, buffer):
+    storage.create_action_records([_record(1), _record(2, user_id="user-2")])
+    buffer.record(_record(3, user_id="user-2"))
+    buffer.record(_record(4))
+    assert _pages("user-1", 10) == [[4, 1]]
@@ -0,0 +1,103 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from app.services.ai_skills.week_packer import (
+    PAEI_STYLES,
+    PackingItem,
+    from_minutes,
+    pack,
+    working_windows,
+)
+
+MONDAY = datetime.date(2030, 1, 7)
+WEEKDAYS = [0, 1, 2, 3, 4]
+LONG_AGO = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _week(timezone="UTC", days=5, start_hour=9, end_hour=17, first_day=MONDAY):
+    return working_windows(first_day, days, timezone, start_hour, end_hour, WEEKDAYS, not_before=LONG_AGO)
+
+
+def _day_of(placement, windows):
+    for window in windows:
+        if window.start <= placement.start and placement.end <= window.end:
+            return window.day
+    raise AssertionError(f"{placement} is outside every working window")
+
+
+def test_placements_never_overlap_and_keep_the_buffer():
+    windows = _week()
+    items = [PackingItem(key, 90, 3, priority=key % 5 + 1) for key in range(8)]
+    for name, style in PAEI_STYLES.items():
+        placements, _ = pack(items, windows, style)
+        assert placements, name
+        ordered = sorted(placements, key=lambda placement: placement.start)
+        for before, after in zip(ordered, ordered[1:]):
+            assert before.end + style.buffer_minutes <= after.start, name
+
+
+def test_placements_stay_inside_working_hours():
+    windows = _week()
+    items = [PackingItem(key, 45, 2, priority=3) for key in range(10)]
+    for style in PAEI_STYLES.values():
+        placements, _ = pack(items, windows, style)
+        for placement in placements:
+            _day_of(placement, windows)
+            assert placement.end - placement.start == 45
+
+
+def test_sessions_of_one_task_go_on_different_days():
+    windows = _week()
+    placements, unplaced = pack([PackingItem(0, 60, 4, priority=5)], windows, PAEI_STYLES["P"])
+    assert unplaced == {}
+    assert len({_day_of(placement, windows) for placement in placements}) == 4
+
+
+def test_skip_first_day_leaves_the_first_day_free():
+    windows = _week()
+    placements, _ = pack([PackingItem(0, 60, 2, priority=5)], windows, PAEI_STYLES["E"])
+    assert placements
+    assert all(_day_of(placement, windows) != 0 for placement in placements)
+
+
+def test_skip_first_day_still_plans_a_single_day():
+    windows = _week(days=1)
+    placements, unplaced = pack([PackingItem(0, 60, 1, priority=5)], windows, PAEI_STYLES["E"])
+    assert len(placements) == 1 and unplaced == {}
+
+
+def test_sessions_that_do_not_fit_are_reported_unplaced():
+    windows = _week(days=2)  # two 8-hour days
+    items = [PackingItem(0, 240, 3, priority=5), PackingItem(1, 300, 2, priority=1)]
+    placements, unplaced = pack(items, windows, PAEI_STYLES["P"])
+    # Task 0 can use each day once; task 1's 5-hour sessions no longer fit
+    assert sum(1 for placement in placements if placement.key == 0) == 2
+    assert unplaced == {0: 1, 1: 2}
+
+
+def test_windows_follow_local_time_across_dst():
+    # Europe/Berlin moves from UTC+1 to UTC+2 on 2030-03-31
+    zone = ZoneInfo("Europe/Berlin")
+    windows = working_windows(
+        datetime.date(2030, 3, 29), 4, "Europe/Berlin", 9, 17, [0, 1, 2, 3, 4, 5, 6], not_before=LONG_AGO
+    )
+    assert [window.utc_offset for window in windows] == [60, 60, 120, 120]
+    for window in windows:
+        assert from_minutes(window.start).astimezone(zone).hour == 9
+        assert from_minutes(window.end).astimezone(zone).hour == 17
+
+
+def test_starts_align_to_local_hours_with_half_hour_offsets():
+    zone = ZoneInfo("Asia/Kolkata")  # UTC+5:30
+    windows = _week(timezone="Asia/Kolkata")
+    placements, _ = pack([PackingItem(key, 60, 2, priority=3) for key in range(4)], windows, PAEI_STYLES["A"])
+    assert placements
+    assert all(from_minutes(placement.start).astimezone(zone).minute == 0 for placement in placements)
+
+
+def test_windows_start_no_earlier_than_not_before():
+    not_before = datetime.datetime(2030, 1, 8, 13, 10, tzinfo=datetime.timezone.utc)
+    windows = working_windows(MONDAY, 5, "UTC", 9, 17, WEEKDAYS, not_before=not_before)
+    # Monday is over, Tuesday starts at the cut-off
+    assert [window.day for window in windows] == [1, 2, 3, 4]
+    assert from_minutes(windows[0].start) == not_before.replace(second=0)